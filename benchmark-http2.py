@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""Compares HTTP/1.1 and HTTP/2 for concurrent chat search requests.
+
+Usage: benchmark-http2.py BASE_URL [REQUESTS] [CONCURRENCY]
+
+BASE_URL is a Zendesk Chat API or a local stand-in serving the same paths over
+TLS, HTTP/2 is only negotiated over TLS. The requests are issued through
+Client from CONCURRENCY threads, and through AsyncClient with CONCURRENCY
+requests in flight, once with each transport. The wall time, requests per
+second, p50/p95 latency and errors are printed for every run.
+"""
+import asyncio
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tap_zendesk_chat.async_http import AsyncClient
+from tap_zendesk_chat.http import Client
+
+base_url = sys.argv[1]
+num_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+logging.disable(logging.INFO)
+
+
+def make_client(http2):
+    client = Client({"access_token": "benchmark", "http2": http2})
+    client.base_url = base_url
+    return client
+
+
+def params(idx):
+    return {"q": f"type:chat AND id:{idx}"}
+
+
+def run_threads(http2):
+    client = make_client(http2)
+    latencies, errors = [], []
+
+    def fetch(idx):
+        started = time.monotonic()
+        try:
+            client.request("chats", params=params(idx), url_extra="/search")
+            latencies.append(time.monotonic() - started)
+        except Exception as err:
+            errors.append(err)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(fetch, range(num_requests)))
+    return latencies, errors
+
+
+def run_async(http2):
+    client = make_client(http2)
+    latencies, errors = [], []
+
+    async def fetch(aclient, semaphore, idx):
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                await aclient.request("chats", params=params(idx), url_extra="/search")
+                latencies.append(time.monotonic() - started)
+            except Exception as err:
+                errors.append(err)
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+        async with AsyncClient(client, concurrency) as aclient:
+            await asyncio.gather(*(fetch(aclient, semaphore, idx) for idx in range(num_requests)))
+
+    asyncio.run(run())
+    return latencies, errors
+
+
+for name, runner, http2 in (
+    ("threads http/1.1", run_threads, False),
+    ("threads http/2", run_threads, True),
+    ("async http/1.1", run_async, False),
+    ("async http/2", run_async, True),
+):
+    started = time.monotonic()
+    latencies, errors = runner(http2)
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] if latencies else 0
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+    print(
+        f"{name:17} {num_requests} requests in {elapsed:.2f}s, {num_requests / elapsed:.0f} req/s, "
+        f"p50 {p50 * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms, {len(errors)} errors"
+    )
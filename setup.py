@@ -13,10 +13,18 @@ setup(
         "singer-python==5.13.2",
         "requests==2.32.4",
     ],
-    extras_require={"dev": ["pylint", "ipdb", "nose"]},
+    extras_require={
+        "dev": ["pylint", "ipdb", "nose"],
+        "fast-json": ["orjson"],
+        "async": ["aiohttp"],
+        "http2": ["httpx[http2]"],
+        "parquet": ["pyarrow"],
+    },
     entry_points="""
     [console_scripts]
     tap-zendesk-chat=tap_zendesk_chat:main
+    tap-zendesk-chat-fanout=tap_zendesk_chat.runner:main
+    tap-zendesk-chat-shards=tap_zendesk_chat.shards:main
     """,
     packages=find_packages(exclude=["tests"]),
     package_data={"schemas": ["tap_zendesk_chat/schemas/*.json"]},
@@ -1,4 +1,6 @@
 #!/usr/bin/env python3
+import sys
+
 import singer
 from singer.utils import handle_top_exception, parse_args
 
@@ -10,15 +12,46 @@ REQUIRED_CONFIG_KEYS = ["start_date", "access_token"]
 LOGGER = singer.get_logger()
 
 
+def run_sync(ctx: Context):
+    """runs the sync mode set in the config, the async or tail sync or the
+    regular one."""
+    # the optional modes are imported on use, they pull in slow imports
+    # (asyncio, aiohttp, httpx) the regular sync does not need
+    if ctx.config.get("async_mode"):
+        from . import async_sync  # pylint: disable=import-outside-toplevel
+
+        async_sync.sync(ctx)
+    elif ctx.config.get("tail_interval_seconds"):
+        from . import tail  # pylint: disable=import-outside-toplevel
+
+        tail.run(ctx, float(ctx.config["tail_interval_seconds"]))
+    else:
+        sync(ctx)
+
+
 @handle_top_exception(LOGGER)
 def main():
-    """performs sync and discovery."""
+    """performs sync and discovery, or plans the chats sync with --plan."""
+    plan_mode = "--plan" in sys.argv
+    if plan_mode:
+        # singer's argument parser rejects options it does not know
+        sys.argv.remove("--plan")
     args = parse_args(REQUIRED_CONFIG_KEYS)
     if args.discover:
         discover(args.config).dump()
+    elif plan_mode:
+        from . import planner  # pylint: disable=import-outside-toplevel
+
+        planner.plan(Context(args.config, args.state, args.catalog))
     else:
-        ctx = Context(args.config, args.state, args.catalog or discover(args.config))
-        sync(ctx)
+        # a catalog discovered here has no stream selected, the access checks
+        # would only cost requests
+        ctx = Context(args.config, args.state, args.catalog or discover(args.config, check_access=False))
+        try:
+            run_sync(ctx)
+        finally:
+            ctx.client.close()
+            ctx.telemetry.flush()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import backoff
+import requests
+from singer import get_logger, metrics
+
+from .http import (
+    Client,
+    InvalidConfigurationError,
+    RateLimitException,
+    _on_backoff,
+    check_status,
+)
+from .http2 import Http2Session, client_options, httpx
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+LOGGER = get_logger()
+DEFAULT_CONCURRENCY = 100
+
+
+class ErrorResponse:
+    """the part of requests.Response read from the HTTPError of a failed
+    request, its status decides whether the request is retried."""
+
+    def __init__(self, status_code: int, url: str, content: bytes):
+        self.status_code = status_code
+        self.url = url
+        self.content = content
+
+
+class AsyncClient:
+    """asyncio counterpart of Client.request, many requests can be in flight
+    on one event loop.
+
+    The base url, headers, decoder, telemetry and rate limiter are taken from
+    a Client, so both apply the same base url selection and share one rate
+    limit. Used as an async context manager that owns the aiohttp session, or
+    an HTTP/2 httpx client when the Client uses the HTTP/2 transport.
+    """
+
+    def __init__(self, client: Client, concurrency: int = DEFAULT_CONCURRENCY):
+        self.http2 = isinstance(client.session, Http2Session)
+        if aiohttp is None and not self.http2:
+            raise InvalidConfigurationError("async_mode requires aiohttp, install tap-zendesk-chat[async]")
+        self.client = client
+        self.telemetry = client.telemetry
+        self.rate_limiter = client.rate_limiter
+        self.concurrency = concurrency
+        self.session = None
+
+    async def __aenter__(self):
+        if self.http2:
+            options = client_options(self.client.session.max_connections)
+            self.session = httpx.AsyncClient(headers=self.client.headers, **options)
+        else:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            self.session = aiohttp.ClientSession(headers=self.client.headers, connector=connector)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self.http2:
+            await self.session.aclose()
+        else:
+            await self.session.close()
+
+    async def _fetch(self, url, params):
+        """returns the status code and body of a GET request."""
+        if self.http2:
+            try:
+                response = await self.session.get(url, params=params)
+            except httpx.TransportError as err:
+                raise requests.ConnectionError(str(err)) from err
+            return response.status_code, response.content
+        try:
+            async with self.session.get(url, params=params) as response:
+                return response.status, await response.read()
+        except aiohttp.ClientError as err:
+            raise requests.ConnectionError(str(err)) from err
+
+    # pylint: disable=too-many-positional-arguments
+    @backoff.on_exception(backoff.expo, RateLimitException, max_tries=10, factor=2, on_backoff=_on_backoff)
+    async def request(self, tap_stream_id, params=None, url=None, url_extra=""):
+        with metrics.http_request_timer(tap_stream_id) as timer:
+            url = url or self.client.endpoint_url(tap_stream_id, url_extra)
+            LOGGER.info("calling %s %s", url, params)
+            # the limiter sleeps, it must not block the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self.rate_limiter.acquire)
+            started = time.monotonic()
+            status_code, body = await self._fetch(url, params)
+            self.telemetry.observe_request(tap_stream_id, status_code, time.monotonic() - started)
+            timer.tags[metrics.Tag.http_status_code] = status_code
+
+        check_status(tap_stream_id, status_code)
+        if status_code >= 400:
+            # the same error Client raises through requests' raise_for_status
+            raise requests.HTTPError(
+                f"{status_code} Error for url: {url}", response=ErrorResponse(status_code, url, body)
+            )
+        self.telemetry.observe_bytes(tap_stream_id, len(body))
+        return self.client.loads(body)
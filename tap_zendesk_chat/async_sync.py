@@ -0,0 +1,221 @@
+"""Sync drivers for ``async_mode``, all selected streams are synced
+concurrently on one event loop through an AsyncClient.
+
+Streams paged by since_id still request one page after another, the chats
+search windows are fanned out with up to ``async_window_concurrency`` windows
+in flight. The chats bookmark only advances over the windows that completed in
+order, so the state stays resumable, but the state is written per window
+instead of per page and page offsets are not kept.
+"""
+# the drivers share one signature
+# pylint: disable=too-many-positional-arguments,unused-argument
+import asyncio
+import time
+
+import requests
+from singer import (
+    Transformer,
+    get_logger,
+    metadata,
+    set_currently_syncing,
+    write_schema,
+    write_state,
+)
+
+from . import dedup
+from .async_http import DEFAULT_CONCURRENCY, AsyncClient
+from .context import DeadlineReached
+from .streams import CHAT_TYPES, SEARCH_RESULT_FIELDS, STREAMS, Chats
+from .utils import break_into_intervals
+
+LOGGER = get_logger()
+DEFAULT_WINDOW_CONCURRENCY = 8
+
+
+async def sync_full_table(stream_obj, ctx, aclient, schema, stream_metadata, transformer):
+    response = await aclient.request(stream_obj.tap_stream_id)
+    if stream_obj.tap_stream_id == "account":
+        response = [response]
+    stream_obj.write_page([transformer.transform(rec, schema, metadata=stream_metadata) for rec in response])
+
+
+async def sync_since_id(stream_obj, ctx, aclient, schema, stream_metadata, transformer):
+    """async version of Agents.sync and Bans.sync."""
+    pages = stream_obj.since_id_pages(ctx, schema, stream_metadata, transformer)
+    params = next(pages)
+    while True:
+        try:
+            response = await aclient.request(stream_obj.tap_stream_id, params)
+        except (requests.ConnectionError, requests.HTTPError) as err:
+            response = err
+        try:
+            params = pages.send(response)
+        except StopIteration:
+            return
+
+
+async def _chats_window(stream_obj, ctx, aclient, chat_type, ts_field, start_dt, end_dt, transform_args):
+    """Pages through the search of one window and writes its chats, returns
+    the highest ts_field value written. transform_args are the schema,
+    metadata and transformer of the chats."""
+    max_ts = None
+    next_url = None
+    while True:
+        ctx.check_deadline()
+        if next_url:
+            search_resp = await aclient.request(stream_obj.tap_stream_id, url=next_url)
+        else:
+            params = Chats.search_params(chat_type, ts_field, start_dt, end_dt)
+            search_resp = await aclient.request(stream_obj.tap_stream_id, params=params, url_extra="/search")
+        next_url = search_resp["next_url"]
+        if stream_obj.search_only:
+            _, page_max_ts = stream_obj.write_search_results(search_resp["results"], ts_field, *transform_args)
+        else:
+            _, page_max_ts = await _write_bulk_chats(
+                stream_obj, aclient, search_resp["results"], ts_field, transform_args
+            )
+        if page_max_ts:
+            max_ts = max(max_ts, page_max_ts) if max_ts else page_max_ts
+        if not next_url:
+            if stream_obj.search_only and ts_field not in SEARCH_RESULT_FIELDS:
+                # the search results of chats lack end_timestamp, the
+                # completed window is the bookmark instead
+                return end_dt.isoformat()
+            return max_ts
+
+
+async def _write_bulk_chats(stream_obj, aclient, results, ts_field, transform_args):
+    """fetches and writes the chats of a search page not written yet."""
+    chat_ids = [result["id"] for result in results if result["id"] not in stream_obj.seen_ids]
+    stream_obj.duplicates_skipped += len(results) - len(chat_ids)
+    if not chat_ids:
+        return 0, None
+    body = await aclient.request(stream_obj.tap_stream_id, params={"ids": ",".join(chat_ids)})
+    return stream_obj.write_chats(body["docs"].values(), ts_field, *transform_args)
+
+
+async def pull_chats(stream_obj, ctx, aclient, chat_type, ts_field, transform_args):
+    """async version of Chats._pull, the windows are searched concurrently
+    and the bookmark moves forward as they complete in order. The window
+    start points at the first window that did not complete."""
+    ts_bookmark_key = [stream_obj.tap_stream_id, chat_type + "." + ts_field]
+    window_key = [stream_obj.tap_stream_id, "offset", chat_type + ".window_start"]
+    window_start = ctx.bookmark(window_key) or None
+    max_bookmark = ctx.update_start_date_bookmark(ts_bookmark_key)
+    start_time = window_start or stream_obj.search_start(ctx, max_bookmark)
+    # the page offsets of an interrupted sync are not used, its window is
+    # searched again and its start kept until that window completes
+    ctx.set_bookmark([stream_obj.tap_stream_id, "offset", chat_type + ".next_url"], None)
+    ctx.set_bookmark([stream_obj.tap_stream_id, "offset", chat_type + ".pending_ids"], None)
+
+    interval_days = int(ctx.config.get("chat_search_interval_days", "14"))
+    semaphore = asyncio.Semaphore(int(ctx.config.get("async_window_concurrency", DEFAULT_WINDOW_CONCURRENCY)))
+
+    async def window(start_dt, end_dt):
+        async with semaphore:
+            started = time.monotonic()
+            max_ts = await _chats_window(
+                stream_obj, ctx, aclient, chat_type, ts_field, start_dt, end_dt, transform_args
+            )
+            return max_ts, round(time.monotonic() - started, 3)
+
+    windows = list(break_into_intervals(interval_days, start_time, stream_obj.end_time(ctx)))
+    tasks = [asyncio.ensure_future(window(start_dt, end_dt)) for start_dt, end_dt in windows]
+    try:
+        for (start_dt, end_dt), task in zip(windows, tasks):
+            max_ts, seconds = await task
+            if max_ts:
+                max_bookmark = max(max_bookmark, max_ts)
+            ctx.set_bookmark(ts_bookmark_key, max_bookmark)
+            ctx.set_bookmark(window_key, end_dt)
+            ctx.write_state()
+            ctx.telemetry.observe_window(
+                stream_obj.tap_stream_id,
+                {"chat_type": chat_type, "start": start_dt.isoformat(), "end": end_dt.isoformat(), "seconds": seconds},
+            )
+    finally:
+        for task in tasks:
+            task.cancel()
+    ctx.set_bookmark(window_key, None)
+    ctx.write_state()
+
+
+async def sync_chats(stream_obj, ctx, aclient, schema, stream_metadata, transformer):
+    """async version of Chats.sync, both chat types are pulled
+    concurrently."""
+
+    stream_obj.seen_ids = dedup.from_config(ctx.config)
+    stream_obj.search_only = stream_obj.is_search_only(ctx.config, schema, stream_metadata)
+    if ctx.config.get("chats_full_sync_mode") == "rolling":
+        LOGGER.warning("The rolling chats resync is not supported in async_mode and is skipped")
+    elif stream_obj.should_run_full_sync(ctx):
+        stream_obj.start_full_sync(ctx)
+    await asyncio.gather(
+        *(
+            pull_chats(stream_obj, ctx, aclient, chat_type, ts_field, (schema, stream_metadata, transformer))
+            for chat_type, ts_field in CHAT_TYPES
+        )
+    )
+    if "chats_full_sync_started" in ctx.state:
+        ctx.state["chats_last_full_sync"] = ctx.state.pop("chats_full_sync_started")
+        ctx.write_state()
+    stream_obj.log_skipped()
+
+
+DRIVERS = {"agents": sync_since_id, "bans": sync_since_id, "chats": sync_chats}
+
+
+async def sync_stream(ctx, aclient, stream, transformer: Transformer):
+    tap_stream_id = stream.tap_stream_id
+    stream_schema = stream.schema.to_dict()
+    stream_metadata = metadata.to_map(stream.metadata)
+    stream_obj = STREAMS[tap_stream_id]()
+    LOGGER.info("Starting sync for stream: %s", tap_stream_id)
+    write_schema(tap_stream_id, stream_schema, stream_obj.key_properties, stream.replication_key)
+    started = time.monotonic()
+    driver = DRIVERS.get(tap_stream_id, sync_full_table)
+    if ctx.output:
+        stream_obj.batch_writer = ctx.output.writer(tap_stream_id, stream_schema, stream_metadata)
+    try:
+        with stream_obj.counter:
+            await driver(stream_obj, ctx, aclient, stream_schema, stream_metadata, transformer)
+    finally:
+        if ctx.output:
+            ctx.output.checkpoint()
+        elapsed = time.monotonic() - started
+        LOGGER.info(
+            "Finished sync for stream: %s, %s records in %.1f seconds", tap_stream_id, stream_obj.record_count, elapsed
+        )
+        ctx.telemetry.observe_stream(tap_stream_id, stream_obj.record_count, elapsed)
+
+
+async def sync_async(ctx, aclient):
+    streams = []
+    for stream in ctx.catalog.get_selected_streams(ctx.state):
+        if STREAMS[stream.tap_stream_id].parent_stream:
+            LOGGER.warning("Skipping child stream %s, not supported in async_mode", stream.tap_stream_id)
+        else:
+            streams.append(stream)
+    with Transformer() as transformer:
+        results = await asyncio.gather(
+            *(sync_stream(ctx, aclient, stream, transformer) for stream in streams), return_exceptions=True
+        )
+    for result in results:
+        if isinstance(result, DeadlineReached):
+            LOGGER.info("Reached max_runtime_seconds, stopped async sync")
+        elif isinstance(result, BaseException):
+            raise result
+
+
+def sync(ctx):
+    """performs sync for the selected streams concurrently."""
+    concurrency = int(ctx.config.get("async_concurrency", DEFAULT_CONCURRENCY))
+
+    async def run():
+        async with AsyncClient(ctx.client, concurrency) as aclient:
+            await sync_async(ctx, aclient)
+
+    ctx.state = set_currently_syncing(ctx.state, None)
+    asyncio.run(run())
+    write_state(ctx.state)
+    ctx.telemetry.write_summary({"subdomain": ctx.config.get("subdomain")})
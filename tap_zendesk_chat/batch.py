@@ -0,0 +1,260 @@
+"""Columnar output, set with ``"output_format": "parquet"`` or ``"arrow"``.
+
+The records of the streams in ``batch_streams`` (default chats and its child
+streams) are written to files in ``output_dir`` instead of stdout. The
+columns are typed from the stream schemas. Every finished file is announced
+with a BATCH message, in the form Meltano SDK targets read. Other streams are
+still written as RECORD messages.
+
+A STATE message is only written once every record before it is in a
+finished file. Until then the latest state is held back, and it is written
+after the pending records are, at the end of every stream, when a file is
+full or once a state has been held back for ``batch_checkpoint_seconds``.
+"""
+import copy
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+import singer
+from singer import get_logger
+
+from .http import InvalidConfigurationError
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+LOGGER = get_logger()
+FORMATS = ("parquet", "arrow")
+DEFAULT_STREAMS = (
+    "chats",
+    "chat_history",
+    "chat_webpath",
+    "chat_conversion",
+    "chat_visitor",
+    "chat_response_time",
+    "chat_count",
+)
+# the arrow type factories of the JSON schema scalar types
+SCALAR_TYPES = {"string": "string", "integer": "int64", "number": "float64", "boolean": "bool_"}
+DEFAULT_ROW_GROUP_SIZE = 10000
+DEFAULT_FILE_ROWS = 1000000
+DEFAULT_COMPRESSION = "snappy"
+DEFAULT_CHECKPOINT_SECONDS = 300
+
+
+class BatchMessage(singer.Message):
+    def __init__(self, stream, encoding, manifest):
+        self.stream = stream
+        self.encoding = encoding
+        self.manifest = manifest
+
+    def asdict(self):
+        return {"type": "BATCH", "stream": self.stream, "encoding": self.encoding, "manifest": self.manifest}
+
+
+def _identity(value):
+    return value
+
+
+def _json_string(value):
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def _timestamp(value):
+    if value is None:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc)
+
+
+def _emitted(stream_metadata: dict, name: str) -> bool:
+    field_metadata = stream_metadata.get(("properties", name), {})
+    return field_metadata.get("selected") is not False and field_metadata.get("inclusion") != "unsupported"
+
+
+def arrow_type(schema: dict):
+    """returns the arrow type of a JSON schema and the function converting a
+    transformed value to it. Values of several types and objects without
+    properties are kept as strings, JSON encoded unless they are strings."""
+    types = schema.get("type", [])
+    types = [types] if isinstance(types, str) else [kind for kind in types if kind != "null"]
+    if "anyOf" in schema or len(types) != 1:
+        return pa.string(), _json_string
+    kind = types[0]
+    if kind == "string" and schema.get("format") == "date-time":
+        return pa.timestamp("us", tz="UTC"), _timestamp
+    if kind in SCALAR_TYPES:
+        return getattr(pa, SCALAR_TYPES[kind])(), _identity
+    if kind == "array":
+        item_type, convert_item = arrow_type(schema.get("items", {}))
+        return pa.list_(item_type), lambda value: None if value is None else [convert_item(item) for item in value]
+    if kind == "object" and schema.get("properties"):
+        fields = {name: arrow_type(sub) for name, sub in schema["properties"].items()}
+        struct = pa.struct([pa.field(name, field_type) for name, (field_type, _) in fields.items()])
+
+        def convert(value):
+            if value is None:
+                return None
+            return {name: convert_field(value.get(name)) for name, (_, convert_field) in fields.items()}
+
+        return struct, convert
+    return pa.string(), _json_string
+
+
+class StreamWriter:  # pylint: disable=too-many-instance-attributes
+    """Buffers the records of one stream and writes them to files of up to
+    file_rows rows, in row groups of row_group_size rows."""
+
+    def __init__(self, output, tap_stream_id: str, schema: dict, stream_metadata: dict):
+        self.output = output
+        self.tap_stream_id = tap_stream_id
+        # the fields the transformer drops are left out of the columns
+        columns = {
+            name: arrow_type(sub) for name, sub in schema["properties"].items() if _emitted(stream_metadata, name)
+        }
+        self.converters = {name: convert for name, (_, convert) in columns.items()}
+        self.schema = pa.schema([pa.field(name, field_type) for name, (field_type, _) in columns.items()])
+        self.buffer = []
+        self.writer = None
+        self.path = None
+        self.file_rows = 0
+        self.files = 0
+
+    def write(self, records):
+        if records:
+            self.output.pending_writers.add(self)
+        self.buffer.extend(records)
+        if len(self.buffer) >= self.output.row_group_size:
+            self.flush()
+
+    def flush(self):
+        """writes the buffered records as a row group. Once the file is full,
+        every stream's file is finished so the state can be written."""
+        if not self.buffer:
+            return
+        table = pa.Table.from_pydict(
+            {name: [convert(rec.get(name)) for rec in self.buffer] for name, convert in self.converters.items()},
+            schema=self.schema,
+        )
+        if self.writer is None:
+            self._open()
+        if self.output.format == "parquet":
+            self.writer.write_table(table, row_group_size=len(self.buffer))
+        else:
+            self.writer.write_table(table)
+        self.file_rows += len(self.buffer)
+        self.buffer = []
+        if self.file_rows >= self.output.file_rows:
+            self.output.checkpoint()
+
+    def _open(self):
+        self.files += 1
+        name = f"{self.tap_stream_id}-{self.output.run_id}-{self.files:05d}.{self.output.format}"
+        self.path = os.path.join(self.output.output_dir, name)
+        # written under a temporary name, a file only appears once it is complete
+        if self.output.format == "parquet":
+            self.writer = pq.ParquetWriter(self.path + ".tmp", self.schema, compression=self.output.compression)
+        else:
+            self.writer = pa.ipc.new_file(self.path + ".tmp", self.schema)
+
+    def finish(self):
+        """writes the buffered records and closes the open file, then
+        announces it with a BATCH message."""
+        self.flush()
+        if self.writer is None:
+            self.output.pending_writers.discard(self)
+            return
+        self.writer.close()
+        os.replace(self.path + ".tmp", self.path)
+        LOGGER.info("Wrote %s rows of %s to %s", self.file_rows, self.tap_stream_id, self.path)
+        singer.write_message(
+            BatchMessage(self.tap_stream_id, self.output.encoding, [f"file://{os.path.abspath(self.path)}"])
+        )
+        self.writer = None
+        self.file_rows = 0
+        self.output.pending_writers.discard(self)
+
+
+class BatchOutput:  # pylint: disable=too-many-instance-attributes
+    def __init__(self, output_format, output_dir, streams=DEFAULT_STREAMS, **options):
+        if pa is None:
+            raise InvalidConfigurationError(
+                f"output_format {output_format} requires pyarrow, install tap-zendesk-chat[parquet]"
+            )
+        if output_format not in FORMATS:
+            raise InvalidConfigurationError(f"output_format must be one of {', '.join(FORMATS)}")
+        self.format = output_format
+        self.output_dir = output_dir
+        self.streams = set(streams)
+        self.row_group_size = int(options.get("row_group_size", DEFAULT_ROW_GROUP_SIZE))
+        self.file_rows = int(options.get("file_rows", DEFAULT_FILE_ROWS))
+        self.compression = options.get("compression", DEFAULT_COMPRESSION)
+        self.checkpoint_seconds = float(options.get("checkpoint_seconds", DEFAULT_CHECKPOINT_SECONDS))
+        self.run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+        # the writers holding records that are not in a finished file yet
+        self.pending_writers = set()
+        self.pending_state = None
+        self.held_since = None
+        os.makedirs(output_dir, exist_ok=True)
+
+    @property
+    def encoding(self) -> dict:
+        if self.format == "parquet":
+            return {"format": "parquet", "compression": self.compression}
+        return {"format": "arrow", "compression": "none"}
+
+    @classmethod
+    def from_config(cls, config: dict):
+        """returns the output of the output_format set in the config, or
+        None to write RECORD messages."""
+        output_format = config.get("output_format", "singer")
+        if output_format == "singer":
+            return None
+        if not config.get("output_dir"):
+            raise InvalidConfigurationError(f"output_format {output_format} requires output_dir")
+        return cls(
+            output_format,
+            config["output_dir"],
+            config.get("batch_streams", DEFAULT_STREAMS),
+            row_group_size=config.get("batch_row_group_size", DEFAULT_ROW_GROUP_SIZE),
+            file_rows=config.get("batch_file_rows", DEFAULT_FILE_ROWS),
+            compression=config.get("parquet_compression", DEFAULT_COMPRESSION),
+            checkpoint_seconds=config.get("batch_checkpoint_seconds", DEFAULT_CHECKPOINT_SECONDS),
+        )
+
+    def writer(self, tap_stream_id: str, schema: dict, stream_metadata: dict):
+        """returns the writer of a stream written to files, None for the
+        streams written as RECORD messages."""
+        if tap_stream_id not in self.streams:
+            return None
+        return StreamWriter(self, tap_stream_id, schema, stream_metadata)
+
+    def write_state(self, state: dict):
+        """holds the state back while records are pending, the open files are
+        finished early once a state has waited checkpoint_seconds so a large
+        file_rows does not delay the checkpoints."""
+        if not self.pending_writers:
+            singer.write_state(state)
+            return
+        self.pending_state = copy.deepcopy(state)
+        if self.held_since is None:
+            self.held_since = time.monotonic()
+        elif time.monotonic() - self.held_since >= self.checkpoint_seconds:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """writes the pending records to finished files and then the state
+        held back meanwhile."""
+        for writer in list(self.pending_writers):
+            writer.finish()
+        if self.pending_state is not None:
+            singer.write_state(self.pending_state)
+            self.pending_state = None
+        self.held_since = None
@@ -1,3 +1,4 @@
+import time
 from datetime import datetime
 from typing import Dict, List
 
@@ -5,17 +6,34 @@ from singer import Catalog, write_state
 from singer.utils import now
 
 from .http import Client
+from .memory import MemoryBudget
+from .telemetry import Telemetry
 
 
-class Context:
+class DeadlineReached(Exception):
+    """Raised before starting new work once max_runtime_seconds has
+    elapsed."""
+
+
+class Context:  # pylint: disable=too-many-instance-attributes
     """Wrapper Class Around state bookmarking."""
 
-    def __init__(self, config: Dict, state: Dict, catalog: Catalog):
+    def __init__(self, config: Dict, state: Dict, catalog: Catalog, session=None):
         self.config = config
         self.state = state
         self.catalog = catalog
-        self.client = Client(config)
+        self.telemetry = Telemetry.from_config(config)
+        self.client = Client(config, self.telemetry, session)
+        self.memory = MemoryBudget.from_config(config)
+        self.output = None
+        if config.get("output_format", "singer") != "singer":
+            # pyarrow is slow to import and only needed for this output
+            from .batch import BatchOutput  # pylint: disable=import-outside-toplevel
+
+            self.output = BatchOutput.from_config(config)
         self.now = now()
+        max_runtime = config.get("max_runtime_seconds")
+        self.deadline = time.monotonic() + float(max_runtime) if max_runtime else None
 
     @property
     def bookmarks(self):
@@ -48,4 +66,16 @@ class Context:
         return val
 
     def write_state(self):
-        write_state(self.state)
+        if self.output:
+            self.output.write_state(self.state)
+        else:
+            write_state(self.state)
+
+    def out_of_time(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def check_deadline(self):
+        """raises DeadlineReached when the run is out of time, call it only
+        where the state allows resuming."""
+        if self.out_of_time():
+            raise DeadlineReached()
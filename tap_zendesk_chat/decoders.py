@@ -0,0 +1,31 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+# every decoder accepts the raw response bytes, so the body is never decoded
+# to text first; the fastest installed one is preferred
+DECODERS = {"json": json.loads}
+if ujson:
+    DECODERS["ujson"] = ujson.loads
+if orjson:
+    DECODERS["orjson"] = orjson.loads  # pylint: disable=no-member
+PREFERENCE = ("orjson", "ujson", "json")
+
+
+def get_decoder(name: str = None):
+    """returns the loads function of the named JSON library, or of the
+    fastest installed one when no name is given.
+
+    Returns None when the named library is unknown or not installed.
+    """
+    if name is None:
+        name = next(candidate for candidate in PREFERENCE if candidate in DECODERS)
+    return DECODERS.get(name)
@@ -0,0 +1,105 @@
+import hashlib
+import math
+from collections import OrderedDict
+
+from singer import get_logger
+
+from .http import InvalidConfigurationError
+
+DEFAULT_MAX_IDS = 100000
+DEFAULT_ERROR_RATE = 0.001
+DEFAULT_CONFIRM_IDS = 10000
+
+LOGGER = get_logger()
+
+
+class LRUSet:
+    """Set of the max_ids most recently added or looked up ids, the least
+    recently used id is dropped once it is full."""
+
+    # lookups are exact, every id found was added
+    unconfirmed = 0
+
+    def __init__(self, max_ids: int = DEFAULT_MAX_IDS):
+        self.max_ids = max_ids
+        self.ids = OrderedDict()
+
+    def __contains__(self, item) -> bool:
+        if item in self.ids:
+            self.ids.move_to_end(item)
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, item):
+        self.ids[item] = None
+        self.ids.move_to_end(item)
+        if len(self.ids) > self.max_ids:
+            self.ids.popitem(last=False)
+
+
+class BloomFilter:
+    """Probabilistic set sized for capacity ids at the given false positive
+    rate, its memory use does not grow with the number of ids added.
+
+    A false positive makes a chat look already emitted. Hits are confirmed
+    against the confirm_ids most recently added ids, which covers the
+    overlapping searches of a run, a hit outside them may be a false positive
+    and is counted in unconfirmed and logged with its id.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_MAX_IDS,
+        error_rate: float = DEFAULT_ERROR_RATE,
+        confirm_ids: int = DEFAULT_CONFIRM_IDS,
+    ):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self.recent = LRUSet(confirm_ids)
+        self.unconfirmed = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(str(item).encode("utf-8"), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+        return ((first + idx * second) % self.size for idx in range(self.hashes))
+
+    def __contains__(self, item) -> bool:
+        if item in self.recent:
+            return True
+        if not all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item)):
+            return False
+        self.unconfirmed += 1
+        LOGGER.warning("Skipping chat %s, it is in the bloom filter but may be a false positive", item)
+        return True
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.recent.add(item)
+        self.count += 1
+
+
+def from_config(config: dict):
+    """returns the set used to drop chats emitted earlier in the run, chosen
+    by chats_dedup_mode ("lru" or "bloom") and sized by
+    chats_dedup_max_ids, the bloom hits are confirmed against the last
+    chats_dedup_confirm_ids ids."""
+    max_ids = int(config.get("chats_dedup_max_ids", DEFAULT_MAX_IDS))
+    mode = config.get("chats_dedup_mode", "lru")
+    if mode == "lru":
+        return LRUSet(max_ids)
+    if mode == "bloom":
+        return BloomFilter(
+            max_ids,
+            float(config.get("chats_dedup_error_rate", DEFAULT_ERROR_RATE)),
+            int(config.get("chats_dedup_confirm_ids", DEFAULT_CONFIRM_IDS)),
+        )
+    raise InvalidConfigurationError(f"Unknown chats_dedup_mode {mode!r}, expected 'lru' or 'bloom'")
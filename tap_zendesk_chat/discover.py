@@ -5,7 +5,6 @@ from singer.metadata import get_standard_metadata, to_list, to_map, write
 
 from .http import Client
 from .streams import STREAMS
-from .utils import load_schema
 
 LOGGER = singer.get_logger()
 
@@ -39,6 +38,8 @@ def get_metadata(schema: dict, stream):
         }
     )
     stream_metadata = to_map(stream_metadata)
+    if stream.parent_stream:
+        stream_metadata = write(stream_metadata, (), "parent-tap-stream-id", stream.parent_stream)
     if stream.valid_replication_keys is not None:
         for key in stream.valid_replication_keys:
             stream_metadata = write(stream_metadata, ("properties", key), "inclusion", "automatic")
@@ -46,16 +47,24 @@ def get_metadata(schema: dict, stream):
     return stream_metadata
 
 
-def discover(config: dict) -> Catalog:
-    """discover function for tap-zendesk-chat."""
-    if config:
+def discover(config: dict, check_access: bool = True) -> Catalog:
+    """discover function for tap-zendesk-chat.
+
+    The API is only called to check the credentials and whether the account
+    stream is available, which is skipped when check_access is False or
+    offline_discovery is set in the config.
+    """
+    # the registry is copied, not mutated, so discovering one account does
+    # not hide a stream from another account synced in the same process
+    available_streams = dict(STREAMS)
+    if config and check_access and not config.get("offline_discovery"):
         client = Client(config)
         client.request(STREAMS["chats"].tap_stream_id)
         if account_not_authorized(client):
-            STREAMS.pop("account")
+            available_streams.pop("account")
     streams = []
-    for stream_name, stream in STREAMS.items():
-        schema = load_schema(stream.tap_stream_id)
+    for stream_name, stream in available_streams.items():
+        schema = stream.load_schema()
         streams.append(
             {
                 "stream": stream_name,
@@ -0,0 +1,158 @@
+"""Hedged GET requests, set with ``"hedge_requests": true``.
+
+A request still running after the ``hedge_percentile`` latency of its
+endpoint gets a duplicate, and whichever response arrives first is used.
+The duplicate takes a slot from the rate limiter like any other request.
+A request cannot be aborted once sent, so the slower response is closed and
+discarded when it arrives.
+
+The requests are sent from ``hedge_workers`` long-lived threads, so
+transports keeping a connection per thread (HTTP/2) reuse it. While every
+worker is busy with slow requests, requests are sent without a duplicate.
+"""
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from functools import partial
+
+from singer import get_logger
+
+LOGGER = get_logger()
+DEFAULT_PERCENTILE = 0.95
+# the latency histogram needs this many requests before it is trusted
+DEFAULT_MIN_SAMPLES = 20
+# never hedge before this many seconds, fast endpoints would hedge on noise
+DEFAULT_MIN_DELAY = 1.0
+# a request and its duplicate take two workers, the rest wait out slow losers
+DEFAULT_WORKERS = 4
+
+
+def _discard(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class Workers:
+    """Daemon threads calling the submitted functions, started on demand up
+    to size. A request that never returns must not keep the tap from
+    exiting, so the threads are not joined."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.tasks = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.threads = []
+        # the threads not running a function
+        self.idle = 0
+
+    def submit(self, fn):
+        """returns the future of fn(), None when every thread is busy."""
+        with self.lock:
+            if not self.idle:
+                if len(self.threads) >= self.size:
+                    return None
+                thread = threading.Thread(target=self._run, name=f"hedge-{len(self.threads)}", daemon=True)
+                self.threads.append(thread)
+                thread.start()
+                self.idle += 1
+            self.idle -= 1
+        future = Future()
+        self.tasks.put((future, fn))
+        return future
+
+    def _run(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            future, fn = task
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn())
+                except BaseException as err:
+                    future.set_exception(err)
+            with self.lock:
+                self.idle += 1
+
+    def close(self):
+        """stops the threads once they finish their functions."""
+        with self.lock:
+            threads, self.threads = self.threads, []
+            self.idle = 0
+        for _ in threads:
+            self.tasks.put(None)
+
+
+class Hedger:  # pylint: disable=too-many-instance-attributes
+    def __init__(
+        self,
+        telemetry,
+        rate_limiter,
+        percentile: float = DEFAULT_PERCENTILE,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+        min_delay: float = DEFAULT_MIN_DELAY,
+        *,
+        workers: int = DEFAULT_WORKERS,
+    ):
+        self.telemetry = telemetry
+        self.rate_limiter = rate_limiter
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.workers = Workers(max(workers, 2))
+
+    @classmethod
+    def from_config(cls, config: dict, telemetry, rate_limiter):
+        if not config.get("hedge_requests"):
+            return None
+        return cls(
+            telemetry,
+            rate_limiter,
+            float(config.get("hedge_percentile", DEFAULT_PERCENTILE)),
+            int(config.get("hedge_min_samples", DEFAULT_MIN_SAMPLES)),
+            float(config.get("hedge_min_delay_seconds", DEFAULT_MIN_DELAY)),
+            workers=int(config.get("hedge_workers", DEFAULT_WORKERS)),
+        )
+
+    def delay(self, endpoint: str):
+        """returns the seconds after which a request to endpoint is hedged,
+        None until enough of its latencies are known."""
+        hist = self.telemetry.latency.get(endpoint)
+        if hist is None or hist.count < self.min_samples:
+            return None
+        return max(self.min_delay, hist.quantile(self.percentile))
+
+    def send(self, endpoint: str, send):
+        """returns the response of send(), calling it a second time when the
+        first call is slower than the endpoint's hedge delay."""
+        delay = self.delay(endpoint)
+        first = self.workers.submit(send) if delay is not None else None
+        if first is None:
+            return send()
+        hedge = None
+        done, pending = wait({first}, timeout=delay)
+        if not done:
+            hedge = self.workers.submit(partial(self._send_hedge, send))
+            if hedge is None:
+                LOGGER.info("Request to %s is slower than %.1f seconds, no worker left to hedge it", endpoint, delay)
+                done, pending = wait(pending)
+            else:
+                LOGGER.info("Request to %s is slower than %.1f seconds, hedging it", endpoint, delay)
+                done, pending = wait(pending | {hedge}, return_when=FIRST_COMPLETED)
+            # a failed request still waits for the other one
+            if all(future.exception() is not None for future in done) and pending:
+                done, pending = wait(pending)
+        winner = next((future for future in done if future.exception() is None), next(iter(done)))
+        if hedge is not None:
+            self.telemetry.observe_hedge(endpoint, winner is hedge)
+        for future in (done | pending) - {winner}:
+            future.add_done_callback(_discard)
+        return winner.result()
+
+    def _send_hedge(self, send):
+        # the duplicate is a request like any other for the rate limit
+        self.rate_limiter.acquire()
+        return send()
+
+    def close(self):
+        self.workers.close()
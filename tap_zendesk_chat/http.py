@@ -1,9 +1,19 @@
+import time
+from functools import partial
+
 import backoff
 import requests
 from singer import get_logger, metrics
 
+from .decoders import get_decoder
+from .hedge import Hedger
+from .jsonstream import iter_object_items
+from .ratelimit import RateLimiter
+from .telemetry import Telemetry
+
 LOGGER = get_logger()
 BASE_URL = "https://www.zopim.com"
+CHUNK_SIZE = 64 * 1024
 
 
 class RateLimitException(Exception):
@@ -13,16 +23,60 @@ class InvalidConfigurationError(Exception):
     pass
 
 
-class Client:
-    def __init__(self, config):
+def check_status(tap_stream_id, status_code):
+    """raises RateLimitException for the statuses that are retried and warns
+    about the search pagination limit."""
+    if status_code in [429, 502]:
+        raise RateLimitException()
+    elif status_code == 400:
+        LOGGER.warning(
+            "The amount of data present for in %s stream is huge,\
+            The api has a pagination limit of 251 pages, please reduce the search window for this stream",
+            tap_stream_id,
+        )
+
+
+def _on_backoff(details):
+    """records the time slept before a retry on the client's telemetry and
+    holds back other requests sharing the client's rate limit."""
+    args = details["args"]
+    endpoint = args[1] if len(args) > 1 else details["kwargs"].get("tap_stream_id")
+    args[0].telemetry.observe_backoff(details["wait"], endpoint)
+    args[0].rate_limiter.penalize(details["wait"])
+
+
+class Client:  # pylint: disable=too-many-instance-attributes
+    def __init__(self, config, telemetry: Telemetry = None, session: requests.Session = None):
         self.access_token = config["access_token"]
         self.user_agent = config.get("user_agent", "tap-zendesk-chat")
         self.headers = {}
         self.subdomain = config.get("subdomain")
         self.headers["Authorization"] = f"Bearer {self.access_token}"
         self.headers["User-Agent"] = self.user_agent
+        self.loads = get_decoder(config.get("json_decoder"))
+        if self.loads is None:
+            raise InvalidConfigurationError(f"JSON decoder {config['json_decoder']} is not installed")
         self.base_url = self.get_base_url()
-        self.session = requests.Session()
+        # a session can be shared between clients so they share its connection
+        # pool, it is then closed by its owner
+        self.owns_session = session is None
+        if session is None and config.get("http2"):
+            # httpx is slow to import and only needed for this transport
+            from . import http2  # pylint: disable=import-outside-toplevel
+
+            if http2.httpx is None:
+                raise InvalidConfigurationError("http2 requires httpx, install tap-zendesk-chat[http2]")
+            session = http2.Http2Session(int(config.get("http2_max_connections", http2.DEFAULT_MAX_CONNECTIONS)))
+        self.session = session or requests.Session()
+        self.telemetry = telemetry or Telemetry()
+        self.rate_limiter = RateLimiter.from_config(config)
+        self.hedger = Hedger.from_config(config, self.telemetry, self.rate_limiter)
+
+    def close(self):
+        if self.hedger:
+            self.hedger.close()
+        if self.owns_session:
+            self.session.close()
 
     def get_base_url(self):
         """
@@ -50,23 +104,42 @@ class Client:
                 return domain
         raise InvalidConfigurationError("Please check the URL or reauthenticate")
 
-    @backoff.on_exception(backoff.expo, RateLimitException, max_tries=10, factor=2)
-    def request(self, tap_stream_id, params=None, url=None, url_extra=""):
+    def endpoint_url(self, tap_stream_id, url_extra=""):
+        if self.base_url == BASE_URL:
+            return f"{self.base_url}/api/v2/{tap_stream_id}{url_extra}"
+        return f"{self.base_url}/api/v2/chat/{tap_stream_id}{url_extra}"
+
+    # pylint: disable=too-many-positional-arguments
+    @backoff.on_exception(backoff.expo, RateLimitException, max_tries=10, factor=2, on_backoff=_on_backoff)
+    def _get(self, tap_stream_id, params=None, url=None, url_extra="", stream=False):
         with metrics.http_request_timer(tap_stream_id) as timer:
-            if self.base_url == BASE_URL:
-                url = url or f"{self.base_url}/api/v2/{tap_stream_id}{url_extra}"
-            else:
-                url = url or f"{self.base_url}/api/v2/chat/{tap_stream_id}{url_extra}"
+            url = url or self.endpoint_url(tap_stream_id, url_extra)
             LOGGER.info("calling %s %s", url, params)
-            response = self.session.get(url, headers=self.headers, params=params)
+            self.rate_limiter.acquire()
+            started = time.monotonic()
+            send = partial(self.session.get, url, headers=self.headers, params=params, stream=stream)
+            response = self.hedger.send(tap_stream_id, send) if self.hedger else send()
+            self.telemetry.observe_request(tap_stream_id, response.status_code, time.monotonic() - started)
             timer.tags[metrics.Tag.http_status_code] = response.status_code
 
-        if response.status_code in [429, 502]:
-            raise RateLimitException()
-        elif response.status_code == 400:
-            LOGGER.warning(
-                "The amount of data present for in %s stream is huge,\
-                The api has a pagination limit of 251 pages, please reduce the search window for this stream"
-            )
+        check_status(tap_stream_id, response.status_code)
         response.raise_for_status()
-        return response.json()
+        return response
+
+    def request(self, tap_stream_id, params=None, url=None, url_extra=""):
+        response = self._get(tap_stream_id, params, url, url_extra)
+        self.telemetry.observe_bytes(tap_stream_id, len(response.content))
+        return self.loads(response.content)
+
+    def request_items(self, tap_stream_id, key, params=None, url=None, url_extra=""):
+        """Yields the (name, value) pairs of the object under key in the
+        response body as they are downloaded, instead of decoding the whole
+        body at once."""
+        response = self._get(tap_stream_id, params, url, url_extra, stream=True)
+        with response:
+            yield from iter_object_items(self._iter_content(tap_stream_id, response), key)
+
+    def _iter_content(self, tap_stream_id, response):
+        for chunk in response.iter_content(CHUNK_SIZE):
+            self.telemetry.observe_bytes(tap_stream_id, len(chunk))
+            yield chunk
@@ -0,0 +1,100 @@
+"""HTTP/2 transport for Client, built on httpx.
+
+Http2Session stands in for the requests.Session used by Client. Its responses
+expose the part of the requests.Response interface Client uses, and errors are
+raised as the equivalent requests exceptions.
+
+httpx's synchronous HTTP/2 connections are not safe to share between threads,
+so each thread gets its own client. Concurrent requests are multiplexed over
+one connection in async_mode, where AsyncClient uses httpx's async HTTP/2
+client.
+"""
+import threading
+
+import requests
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+DEFAULT_MAX_CONNECTIONS = 4
+
+
+def client_options(max_connections: int) -> dict:
+    """returns the options of the httpx clients. Like requests, they wait for
+    slow responses without a timeout and follow redirects, where httpx would
+    time out after 5 seconds and return the redirect."""
+    return {
+        "http2": True,
+        "limits": httpx.Limits(max_connections=max_connections),
+        "timeout": None,
+        "follow_redirects": True,
+    }
+
+
+class Http2Response:
+    def __init__(self, response):
+        self.response = response
+        self.status_code = response.status_code
+        self.url = str(response.url)
+
+    @property
+    def content(self) -> bytes:
+        return self.response.read()
+
+    def iter_content(self, chunk_size):
+        try:
+            yield from self.response.iter_bytes(chunk_size)
+        except httpx.TransportError as err:
+            raise requests.ConnectionError(str(err)) from err
+
+    def raise_for_status(self):
+        try:
+            self.response.raise_for_status()
+        except httpx.HTTPStatusError as err:
+            raise requests.HTTPError(str(err), response=self) from err
+
+    def close(self):
+        self.response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Http2Session:
+    def __init__(self, max_connections: int = DEFAULT_MAX_CONNECTIONS):
+        self.max_connections = max_connections
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.clients = []
+
+    @property
+    def client(self):
+        """returns the httpx client of the calling thread."""
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = httpx.Client(**client_options(self.max_connections))
+            self.local.client = client
+            with self.lock:
+                self.clients.append(client)
+        return client
+
+    def get(self, url, headers=None, params=None, stream=False, timeout=None):
+        extra = {"timeout": timeout} if timeout is not None else {}
+        request = self.client.build_request("GET", url, headers=headers, params=params, **extra)
+        try:
+            return Http2Response(self.client.send(request, stream=stream))
+        except httpx.TimeoutException as err:
+            raise requests.Timeout(str(err)) from err
+        except httpx.TransportError as err:
+            raise requests.ConnectionError(str(err)) from err
+
+    def close(self):
+        with self.lock:
+            clients, self.clients = self.clients, []
+        for client in clients:
+            client.close()
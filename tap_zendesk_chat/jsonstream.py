@@ -0,0 +1,101 @@
+import codecs
+import json
+from typing import Iterable, Iterator, Tuple
+
+WHITESPACE = " \t\n\r"
+_DECODER = json.JSONDecoder()
+
+
+class _Buffer:
+    """Text buffer over an iterable of byte chunks, consumed from the
+    front."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.exhausted = False
+
+    def fill(self, min_chars: int = 1) -> bool:
+        """appends at least min_chars decoded characters, returns False when
+        the input ran out before that."""
+        consumed, self.pos = self.pos, 0
+        self.text = self.text[consumed:]
+        wanted = len(self.text) + min_chars
+        while len(self.text) < wanted:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                self.text += self.decoder.decode(b"", final=True)
+                self.exhausted = True
+                return len(self.text) >= wanted
+            self.text += self.decoder.decode(chunk)
+        return True
+
+    def peek(self) -> str:
+        """returns the next non whitespace character without consuming it."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                raise json.JSONDecodeError("Unexpected end of data", self.text, self.pos)
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if char not in chars:
+            raise json.JSONDecodeError(f"Expected one of {chars!r}", self.text, self.pos)
+        self.pos += 1
+        return char
+
+    def value(self):
+        """decodes the next complete JSON value, reading more input until it
+        is available."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.exhausted:
+                    raise
+                # grow geometrically so a large value is not re-parsed once per chunk
+                self.fill(max(len(self.text) - self.pos, 1))
+                continue
+            if end == len(self.text) and not self.exhausted:
+                # a number at the end of the buffer may continue in the next chunk
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_object_items(chunks: Iterable[bytes], key: str) -> Iterator[Tuple[str, object]]:
+    """Yields the (name, value) pairs of the object stored under key in a top
+    level JSON object, decoding one value at a time from the byte chunks so
+    the whole document never has to be held in memory.
+
+    Other top level members are decoded and discarded.
+    """
+    buf = _Buffer(chunks)
+    buf.expect("{")
+    if buf.peek() == "}":
+        return
+    while True:
+        name = buf.value()
+        buf.expect(":")
+        if name == key and buf.peek() == "{":
+            buf.expect("{")
+            if buf.peek() == "}":
+                buf.expect("}")
+            else:
+                while True:
+                    item_name = buf.value()
+                    buf.expect(":")
+                    yield item_name, buf.value()
+                    if buf.expect(",}") == "}":
+                        break
+        else:
+            buf.value()
+        if buf.expect(",}") == "}":
+            return
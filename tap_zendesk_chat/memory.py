@@ -0,0 +1,88 @@
+from singer import get_logger
+
+LOGGER = get_logger()
+
+# fractions of the budget at which batches are shrunk or allowed to grow back
+HIGH_WATERMARK = 0.8
+LOW_WATERMARK = 0.5
+TOP_ALLOCATORS = 10
+
+
+class MemoryBudget:
+    """Tracks traced allocations against a configured ceiling and sizes bulk
+    batches and page limits to stay under it.
+
+    Tracing only starts, and tracemalloc is only imported, when a budget or
+    diagnostics are configured, since it slows down every allocation.
+    """
+
+    def __init__(self, limit_mb: float = None, diagnostics: bool = False):
+        self.limit = int(float(limit_mb) * 1024 * 1024) if limit_mb else None
+        self.diagnostics = diagnostics
+        self.scale = 1.0
+        self.stream_peak = 0
+        self.peak_snapshot = None
+        self.tracemalloc = None
+        if self.limit or self.diagnostics:
+            import tracemalloc  # pylint: disable=import-outside-toplevel
+
+            self.tracemalloc = tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    @classmethod
+    def from_config(cls, config: dict):
+        return cls(config.get("memory_budget_mb"), bool(config.get("memory_diagnostics")))
+
+    @property
+    def enabled(self) -> bool:
+        return self.tracemalloc is not None and self.tracemalloc.is_tracing()
+
+    def current(self) -> int:
+        """returns the currently traced allocated size in bytes."""
+        return self.tracemalloc.get_traced_memory()[0] if self.enabled else 0
+
+    def batch_size(self, default: int, minimum: int = 1) -> int:
+        """scales the default batch size down while allocations are above the
+        high watermark and back up once they fall below the low watermark."""
+        if not self.limit or not self.enabled:
+            return default
+        used = self.current()
+        if used > self.limit * HIGH_WATERMARK:
+            self.scale = max(self.scale / 2, minimum / max(default, 1))
+            LOGGER.info(
+                "Memory usage %.1f MB is close to the %.1f MB budget, scaling batches to %.0f%%",
+                used / 1024 / 1024,
+                self.limit / 1024 / 1024,
+                self.scale * 100,
+            )
+        elif used < self.limit * LOW_WATERMARK and self.scale < 1.0:
+            self.scale = min(self.scale * 2, 1.0)
+        return max(minimum, int(default * self.scale))
+
+    def start_stream(self):
+        if self.diagnostics and self.enabled:
+            self.tracemalloc.reset_peak()
+            self.stream_peak = 0
+            self.peak_snapshot = None
+
+    def observe(self):
+        """snapshots allocations when a new peak is reached while a page is
+        in memory, used for the diagnostics report."""
+        if self.diagnostics and self.enabled:
+            used = self.current()
+            if used > self.stream_peak:
+                self.stream_peak = used
+                self.peak_snapshot = self.tracemalloc.take_snapshot()
+
+    def report(self, tap_stream_id: str):
+        """logs the peak traced size and the top allocators seen for the
+        stream."""
+        if not (self.diagnostics and self.enabled):
+            return
+        peak = self.tracemalloc.get_traced_memory()[1]
+        LOGGER.info("Memory diagnostics for stream %s: peak traced %.1f MB", tap_stream_id, peak / 1024 / 1024)
+        snapshot = self.peak_snapshot or self.tracemalloc.take_snapshot()
+        snapshot = snapshot.filter_traces((self.tracemalloc.Filter(False, self.tracemalloc.__file__),))
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATORS]:
+            LOGGER.info("Memory diagnostics for stream %s: %s", tap_stream_id, stat)
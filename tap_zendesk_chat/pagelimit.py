@@ -0,0 +1,99 @@
+import requests
+from singer import get_logger
+
+LOGGER = get_logger()
+DEFAULT_PAGE_LIMIT = 100
+MIN_PAGE_LIMIT = 10
+MAX_PAGE_LIMIT = 1000
+# pages answered faster and smaller than these grow, slower ones shrink
+FAST_SECONDS = 1.0
+SLOW_SECONDS = 5.0
+MAX_PAGE_BYTES = 4 * 1024 * 1024
+
+
+class AdaptivePageLimit:  # pylint: disable=too-many-instance-attributes
+    """Sizes the pages of a since_id paginated stream.
+
+    The configured page limit is the starting size and, without
+    adaptive_page_limits, the size of every page. Otherwise the limit doubles
+    after a fast and small response and halves after a slow or large one,
+    between the minimum and maximum. A page shorter than the limit asked for
+    caps the limit at its size, the server does not return more records per
+    page than that. A server error or connection error halves the limit and
+    caps it there for the rest of the stream, and a grown limit the server
+    rejects with a 400 or 422 is capped at half its size.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        adaptive: bool = False,
+        *,
+        minimum: int = MIN_PAGE_LIMIT,
+        maximum: int = MAX_PAGE_LIMIT,
+        fast_seconds: float = FAST_SECONDS,
+        slow_seconds: float = SLOW_SECONDS,
+        max_bytes: int = MAX_PAGE_BYTES,
+    ):
+        self.limit = limit
+        self.initial = limit
+        self.adaptive = adaptive
+        self.minimum = min(minimum, limit)
+        self.ceiling = max(maximum, limit)
+        self.fast_seconds = fast_seconds
+        self.slow_seconds = slow_seconds
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_config(cls, config: dict, tap_stream_id: str):
+        limit = int(config.get(f"{tap_stream_id}_page_limit", DEFAULT_PAGE_LIMIT))
+        return cls(
+            limit,
+            bool(config.get("adaptive_page_limits")),
+            maximum=int(config.get("max_page_limit", MAX_PAGE_LIMIT)),
+            fast_seconds=float(config.get("page_fast_seconds", FAST_SECONDS)),
+            slow_seconds=float(config.get("page_slow_seconds", SLOW_SECONDS)),
+        )
+
+    def _resize(self, limit: int, reason: str):
+        limit = max(self.minimum, min(limit, self.ceiling))
+        if limit != self.limit:
+            LOGGER.info("Page limit %s -> %s (%s)", self.limit, limit, reason)
+            self.limit = limit
+
+    def observe(self, requested: int, returned: int, seconds: float, size: int):
+        """adapts the limit to a page of returned records that was asked for
+        with a limit of requested."""
+        if not self.adaptive:
+            return
+        if 0 < returned < requested:
+            self.ceiling = max(returned, self.minimum)
+        if seconds > self.slow_seconds or size > self.max_bytes:
+            self._resize(self.limit // 2, f"{seconds:.1f}s, {size} bytes")
+        elif seconds < self.fast_seconds and size < self.max_bytes / 2 and returned >= requested:
+            self._resize(self.limit * 2, f"{seconds:.1f}s, {size} bytes")
+        else:
+            self._resize(self.limit, f"{returned} records")
+
+    def shrink_after(self, err: Exception) -> bool:
+        """shrinks the limit after a failed request, returns whether the page
+        should be requested again with the new limit."""
+        if not self.adaptive:
+            return False
+        response = getattr(err, "response", None)
+        status_code = getattr(response, "status_code", None)
+        if status_code in (400, 422):
+            if self.limit <= self.initial:
+                return False
+            # the server does not accept limits this large
+            self.ceiling = max(self.limit // 2, self.initial)
+            self._resize(self.ceiling, f"{status_code} response")
+            return True
+        if isinstance(err, requests.HTTPError) and (status_code is None or status_code < 500):
+            return False
+        if self.limit <= self.minimum:
+            return False
+        # growing back to the size that failed would fail again
+        self.ceiling = max(self.limit // 2, self.minimum)
+        self._resize(self.ceiling, type(err).__name__)
+        return True
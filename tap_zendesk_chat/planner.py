@@ -0,0 +1,129 @@
+"""Dry run of the chats sync, run with ``--plan``.
+
+Only the first search page of every chat search window is requested. Its
+total ``count`` and page size give the pages and bulk requests the window
+will take, and windows that need more than the API's 251 search pages are
+flagged. The report is written to stdout as JSON. It also projects the
+runtime from the observed latency and ``max_requests_per_minute``, and
+suggests a ``chat_search_interval_days`` that keeps the densest window well
+under the page limit.
+"""
+import json
+import math
+import sys
+import time
+
+from singer import get_logger, metadata
+from singer.utils import strptime_to_utc
+
+from .streams import CHAT_TYPES, Chats
+from .sync import selected_children
+from .utils import break_into_intervals
+
+LOGGER = get_logger()
+MAX_SEARCH_PAGES = 251
+# leaves room for chats added while the backfill runs
+SAFE_SEARCH_PAGES = 200
+MAX_SUGGESTED_DAYS = 365
+
+
+def plan_windows(ctx, chat_type, ts_field, interval_days, search_only=False):
+    """returns the estimate for every search window of chat_type that a sync
+    from the current state would run."""
+    stream = Chats()
+    bookmark = ctx.bookmark([stream.tap_stream_id, chat_type + "." + ts_field]) or ctx.config["start_date"]
+    if stream.should_run_full_sync(ctx):
+        bookmark = ctx.config["start_date"]
+    start_time = stream.search_start(ctx, bookmark)
+    windows = []
+    for start_dt, end_dt in break_into_intervals(interval_days, start_time, stream.end_time(ctx)):
+        params = stream.search_params(chat_type, ts_field, start_dt, end_dt)
+        started = time.monotonic()
+        search_resp = ctx.client.request(stream.tap_stream_id, params=params, url_extra="/search")
+        page_size = len(search_resp["results"])
+        # without a count only the first page is known
+        count = search_resp.get("count", page_size)
+        pages = math.ceil(count / page_size) if page_size else 0
+        windows.append(
+            {
+                "chat_type": chat_type,
+                "start": start_dt.isoformat(),
+                "end": end_dt.isoformat(),
+                "count": count,
+                "pages": pages,
+                "bulk_calls": 0 if search_only else pages,
+                "overflow": pages > MAX_SEARCH_PAGES,
+                "seconds": round(time.monotonic() - started, 3),
+            }
+        )
+    return windows
+
+
+def suggest_interval_days(windows, interval_days):
+    """returns the largest interval that keeps the densest window under
+    SAFE_SEARCH_PAGES, assuming chats are spread evenly within a window."""
+    densest = 0.0
+    for window in windows:
+        days = (strptime_to_utc(window["end"]) - strptime_to_utc(window["start"])).total_seconds() / 86400
+        if days:
+            densest = max(densest, window["pages"] / days)
+    if not densest:
+        return max(interval_days, 1)
+    return min(max(int(SAFE_SEARCH_PAGES / densest), 1), MAX_SUGGESTED_DAYS)
+
+
+def summarize(windows, config, interval_days):
+    # every window costs at least its first search, even when it is empty
+    requests = sum(max(window["pages"], 1) + window["bulk_calls"] for window in windows)
+    latency = sum(window["seconds"] for window in windows) / len(windows) if windows else 0.0
+    rpm = config.get("max_requests_per_minute")
+    runtime = max(requests * latency, requests * 60.0 / float(rpm) if rpm else 0.0)
+    return {
+        "chat_search_interval_days": interval_days,
+        "windows": len(windows),
+        "count": sum(window["count"] for window in windows),
+        "search_requests": sum(max(window["pages"], 1) for window in windows),
+        "bulk_requests": sum(window["bulk_calls"] for window in windows),
+        "requests": requests,
+        "overflowing_windows": sum(window["overflow"] for window in windows),
+        "projected_runtime_seconds": round(runtime, 1),
+        "suggested_chat_search_interval_days": suggest_interval_days(windows, interval_days),
+    }
+
+
+def plan(ctx):
+    interval_days = int(ctx.config.get("chat_search_interval_days", "14"))
+    search_only = bool(ctx.config.get("chats_search_only"))
+    chats_entry = ctx.catalog.get_stream("chats") if ctx.catalog else None
+    if chats_entry:
+        search_only = Chats.is_search_only(
+            ctx.config, chats_entry.schema.to_dict(), metadata.to_map(chats_entry.metadata)
+        )
+    if ctx.catalog and selected_children(ctx, "chats"):
+        # the child streams are written from the bulk chats
+        search_only = False
+    windows = []
+    for chat_type, ts_field in CHAT_TYPES:
+        windows.extend(plan_windows(ctx, chat_type, ts_field, interval_days, search_only))
+    summary = summarize(windows, ctx.config, interval_days)
+    for window in windows:
+        if window["overflow"]:
+            LOGGER.warning(
+                "Search window %s to %s of %s has %s pages, more than the %s the API returns",
+                window["start"],
+                window["end"],
+                window["chat_type"],
+                window["pages"],
+                MAX_SEARCH_PAGES,
+            )
+    LOGGER.info(
+        "Planned %s chats in %s windows: %s requests, about %.0f seconds, suggested chat_search_interval_days %s",
+        summary["count"],
+        summary["windows"],
+        summary["requests"],
+        summary["projected_runtime_seconds"],
+        summary["suggested_chat_search_interval_days"],
+    )
+    json.dump({"summary": summary, "windows": windows}, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return summary
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+class RateLimiter:
+    """Spaces requests out evenly to stay under a configured number of
+    requests per minute, safe to share between threads."""
+
+    def __init__(self, requests_per_minute: float = None):
+        self.interval = 60.0 / float(requests_per_minute) if requests_per_minute else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    @classmethod
+    def from_config(cls, config: dict):
+        if config.get("shared_rate_limit_dir"):
+            return SharedRateLimiter.from_config(config)
+        return cls(config.get("max_requests_per_minute"))
+
+    def acquire(self):
+        """blocks until the caller may send its next request."""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            if self.interval:
+                self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def penalize(self, seconds: float):
+        """holds back every request for seconds after a rate limited
+        response."""
+        with self.lock:
+            self.next_slot = max(self.next_slot, time.monotonic() + seconds)
+
+
+class SharedRateLimiter:
+    """Rate limiter whose schedule lives in a locked file, so every process on
+    the host using the same credentials draws from one request budget.
+
+    A rate limited response pauses all of those processes, and afterwards they
+    are handed out distinct slots instead of retrying together.
+    """
+
+    def __init__(self, path: str, requests_per_minute: float = None):
+        if fcntl is None:
+            raise RuntimeError("A shared rate limit requires a platform with fcntl file locks")
+        self.path = path
+        self.interval = 60.0 / float(requests_per_minute) if requests_per_minute else 0.0
+
+    @classmethod
+    def from_config(cls, config: dict):
+        # the file is keyed by the credentials, never named after them
+        key = hashlib.sha256(config["access_token"].encode("utf-8")).hexdigest()[:16]
+        os.makedirs(config["shared_rate_limit_dir"], exist_ok=True)
+        path = os.path.join(config["shared_rate_limit_dir"], f"{key}.json")
+        return cls(path, config.get("max_requests_per_minute"))
+
+    def _update(self, update):
+        """applies update to the shared schedule under an exclusive lock and
+        returns its result."""
+        with open(self.path, "a+", encoding="utf-8") as schedule_file:
+            fcntl.flock(schedule_file, fcntl.LOCK_EX)
+            try:
+                schedule_file.seek(0)
+                content = schedule_file.read()
+                schedule = json.loads(content) if content else {}
+                result = update(schedule, time.time())
+                schedule_file.seek(0)
+                schedule_file.truncate()
+                json.dump(schedule, schedule_file)
+                schedule_file.flush()
+            finally:
+                fcntl.flock(schedule_file, fcntl.LOCK_UN)
+        return result
+
+    def acquire(self):
+        """reserves the next free slot in the shared schedule and sleeps until
+        it starts."""
+
+        def reserve(schedule, now):
+            slot = max(now, schedule.get("next_slot", 0.0), schedule.get("paused_until", 0.0))
+            schedule["next_slot"] = slot + self.interval
+            return slot - now
+
+        wait = self._update(reserve)
+        if wait > 0:
+            time.sleep(wait)
+
+    def penalize(self, seconds: float):
+        def pause(schedule, now):
+            schedule["paused_until"] = max(schedule.get("paused_until", 0.0), now + seconds)
+
+        self._update(pause)
@@ -0,0 +1,145 @@
+"""Syncs many Zendesk Chat accounts concurrently from a single process.
+
+The accounts file is a JSON list with one entry per account::
+
+    [
+        {
+            "name": "acme",
+            "config": "acme/config.json",
+            "state": "acme/state.json",
+            "catalog": "acme/catalog.json",
+            "output": "acme/output.jsonl",
+            "state_output": "acme/state.out.json"
+        }
+    ]
+
+Relative paths are resolved against the directory of the accounts file. Only
+"config" and "output" are required. Each account gets its own Context and
+Client (and so its own state, bookmarks and rate limiter) while all accounts
+share one connection pool, and the singer messages of each account are written
+to its own output file. Accounts with http2 set use their own HTTP/2 client
+instead of the shared pool, async_mode is honoured and tail_interval_seconds
+is rejected since a tailing account never finishes.
+"""
+import argparse
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+import singer
+from singer import Catalog
+from singer.utils import check_config, load_json
+
+from . import REQUIRED_CONFIG_KEYS, run_sync
+from .context import Context
+from .discover import discover
+from .http import InvalidConfigurationError
+
+LOGGER = singer.get_logger()
+
+
+class ThreadRoutedStdout:
+    """Stand-in for sys.stdout that sends each thread's writes to the stream
+    registered for that thread, singer writes every message to sys.stdout."""
+
+    def __init__(self, default):
+        self.default = default
+        self.local = threading.local()
+
+    def route(self, stream):
+        self.local.stream = stream
+
+    def __getattr__(self, name):
+        return getattr(getattr(self.local, "stream", self.default), name)
+
+
+def _resolve(base: Path, path):
+    return str(base / path) if path else None
+
+
+def load_accounts(path: str):
+    base = Path(path).parent
+    accounts = []
+    for idx, entry in enumerate(load_json(path)):
+        accounts.append(
+            {
+                "name": entry.get("name", str(idx)),
+                "config": _resolve(base, entry["config"]),
+                "state": _resolve(base, entry.get("state")),
+                "catalog": _resolve(base, entry.get("catalog")),
+                "output": _resolve(base, entry["output"]),
+                "state_output": _resolve(base, entry.get("state_output")),
+            }
+        )
+    return accounts
+
+
+def sync_account(account: dict, session: requests.Session, stdout: ThreadRoutedStdout):
+    """runs a full sync for one account, writing its messages to the
+    account's output file."""
+    config = load_json(account["config"])
+    check_config(config, REQUIRED_CONFIG_KEYS)
+    if config.get("tail_interval_seconds"):
+        raise InvalidConfigurationError("tail_interval_seconds is not supported when syncing many accounts")
+    state = load_json(account["state"]) if account["state"] else {}
+    catalog = Catalog.load(account["catalog"]) if account["catalog"] else discover(config, check_access=False)
+    with open(account["output"], "w", encoding="utf-8") as output:
+        stdout.route(output)
+        try:
+            # the shared pool only speaks HTTP/1.1
+            ctx = Context(config, state, catalog, session=None if config.get("http2") else session)
+            try:
+                run_sync(ctx)
+            finally:
+                ctx.client.close()
+                ctx.telemetry.flush()
+        finally:
+            stdout.route(stdout.default)
+    if account["state_output"]:
+        with open(account["state_output"], "w", encoding="utf-8") as state_file:
+            json.dump(ctx.state, state_file)
+    LOGGER.info("Finished sync for account %s", account["name"])
+
+
+def run(accounts, workers: int) -> int:
+    """syncs all accounts on a shared pool of worker threads and returns the
+    number of accounts that failed."""
+    session = requests.Session()
+    # every account talks to the shared zopim host or to its own subdomain,
+    # one pool per host keeps them from evicting each other, and a host is
+    # reached by at most one thread per worker
+    adapter = requests.adapters.HTTPAdapter(pool_connections=len(accounts) + 1, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    stdout = ThreadRoutedStdout(sys.stdout)
+    sys.stdout = stdout
+    failed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="account") as pool:
+            futures = {account["name"]: pool.submit(sync_account, account, session, stdout) for account in accounts}
+            for name, future in futures.items():
+                try:
+                    future.result()
+                except Exception as err:
+                    failed += 1
+                    LOGGER.exception("Sync failed for account %s: %s", name, err)
+    finally:
+        sys.stdout = stdout.default
+        session.close()
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync many Zendesk Chat accounts in one process")
+    parser.add_argument("-a", "--accounts", required=True, help="JSON file listing the accounts to sync")
+    parser.add_argument("-w", "--workers", type=int, default=8, help="Number of accounts synced concurrently")
+    args = parser.parse_args()
+    failed = run(load_accounts(args.accounts), args.workers)
+    if failed:
+        sys.exit(f"{failed} account(s) failed to sync")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Splits a chats backfill into time range shards and merges their states.
+
+``plan`` writes one config per shard, each covering ``[start_date,
+chats_end_date]``, plus a ``shards.json`` manifest. Each shard is then run as
+its own tap process and its last emitted state saved to the shard's state
+path. ``merge`` combines the shard states into one state that the regular
+incremental sync can continue from.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from singer.utils import load_json, now, strptime_to_utc
+
+# bookmark keys of the chats stream, see Chats._pull
+CHAT_TYPES = {"chat": "end_timestamp", "offline_msg": "timestamp"}
+
+
+def plan_shards(start: datetime, end: datetime, count: int) -> List[Dict]:
+    """splits [start, end] into count contiguous ranges of equal length."""
+    step = (end - start) / count
+    bounds = [start + step * idx for idx in range(count)] + [end]
+    return [
+        {"name": f"shard-{idx:03d}", "start_date": lower.isoformat(), "chats_end_date": upper.isoformat()}
+        for idx, (lower, upper) in enumerate(zip(bounds, bounds[1:]))
+    ]
+
+
+def _is_complete(state: Dict, chat_type: str) -> bool:
+    """a shard finished a chat type when its sync ran to the end and left no
+    page offset behind."""
+    if not state or state.get("currently_syncing") is not None:
+        return False
+    chats = state.get("bookmarks", {}).get("chats", {})
+    ts_key = f"{chat_type}.{CHAT_TYPES[chat_type]}"
+    offset = chats.get("offset", {})
+    return bool(chats.get(ts_key)) and not any(
+        offset.get(f"{chat_type}.{key}") for key in ("next_url", "pending_ids", "window_start")
+    )
+
+
+def merge_states(shards: List[Dict]) -> Dict:
+    """Merges the states of contiguous shards into one chats bookmark per chat
+    type.
+
+    Shards are walked in time order. Every completed shard moves the bookmark
+    forward; the first incomplete shard contributes its last window-level
+    bookmark and ends the walk, since any later shard left a gap behind it.
+    Page offsets are shard specific and are dropped.
+    """
+    shards = sorted(shards, key=lambda shard: strptime_to_utc(shard["start_date"]))
+    for previous, current in zip(shards, shards[1:]):
+        if strptime_to_utc(previous["chats_end_date"]) != strptime_to_utc(current["start_date"]):
+            raise ValueError(f"Shards {previous['name']} and {current['name']} are not contiguous")
+
+    chats = {"offset": {}}
+    complete = True
+    for chat_type, ts_field in CHAT_TYPES.items():
+        ts_key = f"{chat_type}.{ts_field}"
+        merged = None
+        for shard in shards:
+            state = shard.get("state") or {}
+            bookmark = state.get("bookmarks", {}).get("chats", {}).get(ts_key) or shard["start_date"]
+            if merged is None or strptime_to_utc(bookmark) > strptime_to_utc(merged):
+                merged = bookmark
+            if not _is_complete(state, chat_type):
+                complete = False
+                break
+        chats[ts_key] = merged
+        for key in ("next_url", "pending_ids", "window_start"):
+            chats["offset"][f"{chat_type}.{key}"] = None
+
+    state = {"currently_syncing": None, "bookmarks": {"chats": chats}}
+    if complete:
+        # a finished backfill re-covered the whole history, like a full sync
+        state["chats_last_full_sync"] = shards[-1]["chats_end_date"]
+    return state
+
+
+def plan(args):
+    config = load_json(args.config)
+    end = strptime_to_utc(args.end_date) if args.end_date else now()
+    output_dir = Path(args.output_dir)
+    manifest = []
+    for shard in plan_shards(strptime_to_utc(config["start_date"]), end, args.shards):
+        shard_dir = output_dir / shard["name"]
+        shard_dir.mkdir(parents=True, exist_ok=True)
+        with open(shard_dir / "config.json", "w", encoding="utf-8") as shard_config:
+            shard_config_values = dict(config, start_date=shard["start_date"], chats_end_date=shard["chats_end_date"])
+            json.dump(shard_config_values, shard_config)
+        manifest.append(dict(shard, config=f"{shard['name']}/config.json", state=f"{shard['name']}/state.json"))
+    with open(output_dir / "shards.json", "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+
+def merge(args):
+    base = Path(args.shards).parent
+    shards = []
+    for shard in load_json(args.shards):
+        state_path = base / shard["state"]
+        shards.append(dict(shard, state=load_json(state_path) if state_path.exists() else {}))
+    merged = merge_states(shards)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(merged, output)
+    else:
+        json.dump(merged, sys.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan and merge time range sharded chats backfills")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan_parser = commands.add_parser("plan", help="Write one tap config per shard")
+    plan_parser.add_argument("-c", "--config", required=True, help="Config file to split")
+    plan_parser.add_argument("-n", "--shards", type=int, required=True, help="Number of shards")
+    plan_parser.add_argument("--end-date", help="End of the backfill, defaults to now")
+    plan_parser.add_argument("-o", "--output-dir", required=True, help="Directory for the shard configs")
+    plan_parser.set_defaults(func=plan)
+
+    merge_parser = commands.add_parser("merge", help="Merge the shard states into one state")
+    merge_parser.add_argument("-s", "--shards", required=True, help="shards.json written by plan")
+    merge_parser.add_argument("-o", "--output", help="File for the merged state, defaults to stdout")
+    merge_parser.set_defaults(func=merge)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,23 @@
+import time
 from datetime import timedelta
 from typing import Dict, List
 
+import requests
 import singer
 from singer import Transformer, metrics
 from singer.utils import strptime_to_utc
 
-from .utils import break_into_intervals
+from . import dedup
+from .pagelimit import AdaptivePageLimit
+from .utils import break_into_intervals, load_schema
 
 LOGGER = singer.get_logger()
 
+# the chat types pulled by the chats stream and their bookmark fields
+CHAT_TYPES = (("chat", "end_timestamp"), ("offline_msg", "timestamp"))
+# the chat fields returned by the chats search
+SEARCH_RESULT_FIELDS = {"id", "timestamp", "type", "preview"}
+
 
 class BaseStream:
     """Information about and functions for syncing streams.
@@ -21,22 +30,99 @@ class BaseStream:
 
     valid_replication_keys = set()
     tap_stream_id = None
+    # set on the streams emitted by another stream's sync
+    parent_stream = None
+
+    def __init__(self):
+        # a single counter lives for the whole stream, it logs at throttled
+        # intervals and once more when the stream's sync exits
+        self.counter = metrics.record_counter(self.tap_stream_id)
+        self.record_count = 0
+        # set by sync_stream when transform_workers is configured
+        self.transform_pool = None
+        # set by sync_stream when the stream is written to files
+        self.batch_writer = None
+        # set by sync_stream: the selected child streams this stream writes,
+        # as (stream, schema, metadata)
+        self.children = []
+
+    @classmethod
+    def load_schema(cls) -> Dict:
+        return load_schema(cls.tap_stream_id)
 
     def metrics(self, page):
         "updates the metrics counter for the current stream"
-        with metrics.record_counter(self.tap_stream_id) as counter:
-            counter.increment(len(page))
+        self.counter.increment(len(page))
+        self.record_count += len(page)
+
+    def transform_page(self, transformer: Transformer, page: List, schema: Dict, stream_metadata: Dict) -> List:
+        """transforms a page of records, in the transform worker processes
+        when they are configured."""
+        if self.transform_pool:
+            return self.transform_pool.transform(page)
+        return [transformer.transform(rec, schema, metadata=stream_metadata) for rec in page]
+
+    def page_records(self, response) -> List:
+        """returns the records of a since_id paginated response."""
+        return response
+
+    def since_id_pages(self, ctx, schema: Dict, stream_metadata: Dict, transformer: Transformer):
+        """Syncs a since_id paginated stream, shared by the sync and the
+        async_mode sync. A generator yielding the params of every request, it
+        is sent the response or the ConnectionError or HTTPError the request
+        raised. The page limit adapts to the responses and a request that
+        failed is sent again when the limit shrinks."""
+        since_id_offset = [self.tap_stream_id, "offset", "id"]
+        since_id = ctx.bookmark(since_id_offset) or 0
+        page_limit = AdaptivePageLimit.from_config(ctx.config, self.tap_stream_id)
+        while True:
+            ctx.check_deadline()
+            limit = ctx.memory.batch_size(page_limit.limit)
+            size = ctx.telemetry.response_bytes[self.tap_stream_id]
+            started = time.monotonic()
+            response = yield {"since_id": since_id, "limit": limit}
+            if isinstance(response, requests.RequestException):
+                if not page_limit.shrink_after(response):
+                    raise response
+                continue
+            page = self.page_records(response)
+            page_limit.observe(
+                limit, len(page), time.monotonic() - started, ctx.telemetry.response_bytes[self.tap_stream_id] - size
+            )
+            if not page:
+                break
+            ctx.memory.observe()
+            self.write_page(self.transform_page(transformer, page, schema, stream_metadata))
+            since_id = page[-1]["id"] + 1
+            ctx.set_bookmark(since_id_offset, since_id)
+            ctx.write_state()
+        ctx.set_bookmark(since_id_offset, None)
+
+    def sync_since_id(self, ctx, schema: Dict, stream_metadata: Dict, transformer: Transformer):
+        pages = self.since_id_pages(ctx, schema, stream_metadata, transformer)
+        params = next(pages)
+        while True:
+            try:
+                response = ctx.client.request(self.tap_stream_id, params)
+            except (requests.ConnectionError, requests.HTTPError) as err:
+                response = err
+            try:
+                params = pages.send(response)
+            except StopIteration:
+                return
 
     def write_page(self, page: List):
         """Formats a list of records in place and outputs the data to
-        stdout."""
-        singer.write_records(self.tap_stream_id, page)
+        stdout, or to the stream's files with a columnar output_format."""
+        if self.batch_writer:
+            self.batch_writer.write(page)
+        else:
+            singer.write_records(self.tap_stream_id, page)
         self.metrics(page)
 
     def sync(self, ctx, schema: Dict, stream_metadata: Dict, transformer: Transformer):
         response = ctx.client.request(self.tap_stream_id)
-        page = [transformer.transform(rec, schema, metadata=stream_metadata) for rec in response]
-        self.write_page(page)
+        self.write_page(self.transform_page(transformer, response, schema, stream_metadata))
 
 
 class Account(BaseStream):
@@ -58,21 +144,7 @@ class Agents(BaseStream):
     forced_replication_method = "FULL_TABLE"
 
     def sync(self, ctx, schema: Dict, stream_metadata: Dict, transformer: Transformer):
-        since_id_offset = [self.tap_stream_id, "offset", "id"]
-        since_id = ctx.bookmark(since_id_offset) or 0
-        while True:
-            params = {
-                "since_id": since_id,
-                "limit": ctx.config.get("agents_page_limit", 100),
-            }
-            page = ctx.client.request(self.tap_stream_id, params)
-            if not page:
-                break
-            self.write_page([transformer.transform(rec, schema, metadata=stream_metadata) for rec in page])
-            since_id = page[-1]["id"] + 1
-            ctx.set_bookmark(since_id_offset, since_id)
-            ctx.write_state()
-        ctx.set_bookmark(since_id_offset, None)
+        self.sync_since_id(ctx, schema, stream_metadata, transformer)
 
 
 class Bans(BaseStream):
@@ -81,25 +153,11 @@ class Bans(BaseStream):
     key_properties = ["id"]
     forced_replication_method = "FULL_TABLE"
 
-    def sync(self, ctx, schema: Dict, stream_metadata: Dict, transformer: Transformer):
-        since_id_offset = [self.tap_stream_id, "offset", "id"]
-        since_id = ctx.bookmark(since_id_offset) or 0
+    def page_records(self, response) -> List:
+        return response.get("visitor", []) + response.get("ip_address", [])
 
-        while True:
-            params = {
-                "since_id": since_id,
-                "limit": ctx.config.get("bans_page_limit", 100),
-            }
-            response = ctx.client.request(self.tap_stream_id, params)
-            page = response.get("visitor", []) + response.get("ip_address", [])
-            if not page:
-                break
-            page = response["visitor"] + response["ip_address"]
-            self.write_page([transformer.transform(rec, schema, metadata=stream_metadata) for rec in page])
-            since_id = page[-1]["id"] + 1
-            ctx.set_bookmark(since_id_offset, since_id)
-            ctx.write_state()
-        ctx.set_bookmark(since_id_offset, None)
+    def sync(self, ctx, schema: Dict, stream_metadata: Dict, transformer: Transformer):
+        self.sync_since_id(ctx, schema, stream_metadata, transformer)
 
 
 class Chats(BaseStream):
@@ -109,60 +167,329 @@ class Chats(BaseStream):
     forced_replication_method = "INCREMENTAL"
     valid_replication_keys = {"timestamp", "end_timestamp"}
 
+    def __init__(self):
+        super().__init__()
+        # ids of the chats emitted by this run, overlapping searches skip them
+        self.seen_ids = dedup.LRUSet()
+        self.duplicates_skipped = 0
+        self.search_only = False
+        # unset by sync_stream when only the child streams are selected
+        self.emit_records = True
+
     def _bulk_chats(self, ctx, chat_ids: List):
         if not chat_ids:
             return []
         params = {"ids": ",".join(chat_ids)}
+        if ctx.config.get("bulk_chats_streaming"):
+            # chats are decoded one at a time while the response downloads
+            return (chat for _, chat in ctx.client.request_items(self.tap_stream_id, "docs", params=params))
         body = ctx.client.request(self.tap_stream_id, params=params)
         return list(body["docs"].values())
 
+    @staticmethod
+    def is_search_only(config: Dict, schema: Dict, stream_metadata: Dict) -> bool:
+        """the bulk request is skipped when chats_search_only is set, or when
+        it is not set to false and every field emitted is in the search
+        results. end_timestamp is not, so a chats stream emitting it needs
+        chats_search_only."""
+        if "chats_search_only" in config:
+            return bool(config["chats_search_only"])
+        emitted = set()
+        for field in schema.get("properties", {}):
+            field_metadata = stream_metadata.get(("properties", field), {})
+            if field_metadata.get("inclusion") == "automatic" or (
+                field_metadata.get("selected") is not False and field_metadata.get("inclusion") != "unsupported"
+            ):
+                emitted.add(field)
+        return emitted <= SEARCH_RESULT_FIELDS
+
+    def write_search_results(self, results: List, ts_field, schema: Dict, stream_metadata: Dict, transformer):
+        """writes the chats of a search page as returned by the search, returns
+        the number of records written and the highest ts_field value among
+        them."""
+        written, max_ts = 0, None
+        for result in results:
+            if result["id"] in self.seen_ids:
+                self.duplicates_skipped += 1
+                continue
+            record = transformer.transform(result, schema, metadata=stream_metadata)
+            self.write_page([record])
+            self.seen_ids.add(record["id"])
+            written += 1
+            if record.get(ts_field):
+                max_ts = max(max_ts, record[ts_field]) if max_ts else record[ts_field]
+        return written, max_ts
+
+    # pylint: disable=too-many-positional-arguments
+    def _sync_chats(
+        self, ctx, chat_ids: List, ts_field, pending_key, schema: Dict, stream_metadata: Dict, transformer: Transformer
+    ):
+        """Fetches, transforms and writes the chats found on a search page,
+        splitting the bulk request into smaller batches while the memory
+        budget is under pressure.
+
+        The ids not written yet are kept in the state under pending_key and
+        the state is written after every batch. An interrupted sync resumes
+        with the batch it was in, so delivery is at least once per batch,
+        which is the whole page unless the memory budget splits it.
+
+        Chats already emitted by this run are dropped before the bulk
+        request.
+
+        Returns the number of records written and the highest ts_field value
+        among them.
+        """
+        written, max_ts = 0, None
+        new_ids = [chat_id for chat_id in chat_ids if chat_id not in self.seen_ids]
+        self.duplicates_skipped += len(chat_ids) - len(new_ids)
+        chat_ids = new_ids
+        # a page of chats that were all emitted earlier leaves nothing pending
+        ctx.set_bookmark(pending_key, chat_ids or None)
+        while chat_ids:
+            batch_size = ctx.memory.batch_size(len(chat_ids))
+            batch, chat_ids = chat_ids[:batch_size], chat_ids[batch_size:]
+            chats = self._bulk_chats(ctx, batch)
+            ctx.memory.observe()
+            batch_written, batch_max_ts = self.write_chats(chats, ts_field, schema, stream_metadata, transformer)
+            written += batch_written
+            if batch_max_ts:
+                max_ts = max(max_ts, batch_max_ts) if max_ts else batch_max_ts
+            ctx.set_bookmark(pending_key, chat_ids or None)
+            ctx.write_state()
+        return written, max_ts
+
+    # pylint: disable=too-many-positional-arguments
+    def write_chats(self, chats, ts_field, schema: Dict, stream_metadata: Dict, transformer: Transformer):
+        """writes bulk chats and the records of the selected child streams,
+        returns the number of chats written and the highest ts_field value
+        among them."""
+        written, max_ts = 0, None
+        if self.transform_pool:
+            chats = list(chats)
+            pairs = zip(chats, self.transform_pool.transform(chats))
+        else:
+            pairs = ((chat, transformer.transform(chat, schema, metadata=stream_metadata)) for chat in chats)
+        for chat, record in pairs:
+            if self.emit_records:
+                self.write_page([record])
+            self._write_children(chat, transformer)
+            self.seen_ids.add(record["id"])
+            written += 1
+            max_ts = max(max_ts, record[ts_field]) if max_ts else record[ts_field]
+        return written, max_ts
+
+    def _write_children(self, chat: Dict, transformer: Transformer):
+        """writes the records of the selected child streams nested in a bulk
+        chat document."""
+        for child, schema, stream_metadata in self.children:
+            page = child.child_records(chat)
+            if page:
+                child.write_page([transformer.transform(rec, schema, metadata=stream_metadata) for rec in page])
+
     # pylint: disable=too-many-positional-arguments
-    def _pull(self, ctx, chat_type, ts_field, full_sync, schema: Dict, stream_metadata: Dict, transformer: Transformer):
+    def _pull(
+        self, ctx, chat_type, ts_field, schema: Dict, stream_metadata: Dict, transformer: Transformer, resync_end=None
+    ):
         """Pulls and writes pages of data for the given chat_type, where
         chat_type can be either "chat" or "offline_msg".
 
         ts_field determines the property of the chat objects that is used as
         the bookmark for the chat.
 
-        full_sync is a boolean indicating whether or not to pull all chats
-        based on the "start_date" in the config. When this is true, all
-        bookmarks for this chat type will be ignored.
+        Stops with DeadlineReached before requesting a new search page once
+        the run is out of time, the state then points at that page.
+
+        Each search page is checkpointed before its chats are fetched: the
+        state holds the start of the search window, the url of the following
+        page and the ids of the current page that are still pending. A sync
+        resuming from that state restarts the windows at the stored start,
+        first emits the pending chats, then continues with the next page.
+
+        With resync_end set, the windows up to resync_end are pulled again for
+        the rolling resync. The resync cursor and its own offsets are used in
+        place of the incremental bookmark, and the cursor moves to the end of
+        every completed window.
         """
-        ts_bookmark_key = [self.tap_stream_id, chat_type + "." + ts_field]
-        url_offset_key = [self.tap_stream_id, "offset", chat_type + ".next_url"]
-        if full_sync:
-            ctx.set_bookmark(ts_bookmark_key, None)
-            ctx.set_bookmark(url_offset_key, None)
-        start_time = ctx.update_start_date_bookmark(ts_bookmark_key)
-        next_url = ctx.bookmark(url_offset_key)
+        keys = self._pull_keys(chat_type, ts_field, resync_end)
+        start_time = ctx.update_start_date_bookmark(keys["bookmark"])
         max_bookmark = start_time
+        if not resync_end:
+            start_time = self.search_start(ctx, start_time)
+        resume = self._resume_point(ctx, keys)
 
         interval_days = int(ctx.config.get("chat_search_interval_days", "14"))
         LOGGER.info("Using chat_search_interval_days: %s", interval_days)
 
-        for start_dt, end_dt in break_into_intervals(interval_days, start_time, ctx.now):
-            while True:
-                if next_url:
-                    search_resp = ctx.client.request(self.tap_stream_id, url=next_url)
-                else:
-                    params = {"q": f"type:{chat_type} AND {ts_field}:[{start_dt.replace(tzinfo=None).isoformat()} TO {end_dt.replace(tzinfo=None).isoformat()}]"}
-                    search_resp = ctx.client.request(self.tap_stream_id, params=params, url_extra="/search")
-
-                next_url = search_resp["next_url"]
-                ctx.set_bookmark(url_offset_key, next_url)
-                ctx.write_state()
-                chats = self._bulk_chats(ctx, [r["id"] for r in search_resp["results"]])
-                if chats:
-                    chats = [transformer.transform(rec, schema, metadata=stream_metadata) for rec in chats]
-                    self.write_page(chats)
-                    max_bookmark = max(max_bookmark, *[c[ts_field] for c in chats])
-                if not next_url:
-                    break
-            ctx.set_bookmark(ts_bookmark_key, max_bookmark)
+        end_time = resync_end or self.end_time(ctx)
+        for start_dt, end_dt in break_into_intervals(interval_days, resume["window_start"] or start_time, end_time):
+            window_started = time.monotonic()
+            window_records, max_ts = self._pull_window(
+                ctx, chat_type, ts_field, (start_dt, end_dt), keys, resume, (schema, stream_metadata, transformer)
+            )
+            # only the first window resumes from the state
+            resume = {"next_url": None, "pending_ids": [], "rescan": False}
+            if max_ts:
+                max_bookmark = max(max_bookmark, max_ts)
+            if resync_end or (self.search_only and ts_field not in SEARCH_RESULT_FIELDS):
+                # the search results of chats lack end_timestamp, the
+                # completed window is the bookmark instead
+                max_bookmark = end_dt.isoformat()
+            ctx.set_bookmark(keys["bookmark"], max_bookmark)
+            ctx.set_bookmark(keys["window_start"], None)
             ctx.write_state()
+            ctx.telemetry.observe_window(
+                self.tap_stream_id,
+                {
+                    "chat_type": chat_type,
+                    "start": start_dt.isoformat(),
+                    "end": end_dt.isoformat(),
+                    "records": window_records,
+                    "seconds": round(time.monotonic() - window_started, 3),
+                },
+            )
+
+    def _pull_keys(self, chat_type, ts_field, resync_end) -> Dict:
+        """returns the state keys of the bookmark and page offsets of a
+        pull, the rolling resync keeps its own."""
+        if resync_end:
+            bookmark_key = [self.tap_stream_id, chat_type + ".resync_cursor"]
+            offset_prefix = chat_type + ".resync_"
+        else:
+            bookmark_key = [self.tap_stream_id, chat_type + "." + ts_field]
+            offset_prefix = chat_type + "."
+        keys = {"bookmark": bookmark_key}
+        for offset in ("next_url", "pending_ids", "window_start"):
+            keys[offset] = [self.tap_stream_id, "offset", offset_prefix + offset]
+        return keys
+
+    @staticmethod
+    def _resume_point(ctx, keys: Dict) -> Dict:
+        """returns the page offsets an interrupted sync left in the state."""
+        resume = {
+            "next_url": ctx.bookmark(keys["next_url"]),
+            "pending_ids": ctx.bookmark(keys["pending_ids"]) or [],
+            "window_start": ctx.bookmark(keys["window_start"]) or None,
+        }
+        # states written before the window start was checkpointed cannot tell
+        # which window a resumed page belongs to, the first window is then
+        # searched again once the resumed pages run out
+        resume["rescan"] = bool(resume["next_url"] or resume["pending_ids"]) and not resume["window_start"]
+        return resume
 
-    def _should_run_full_sync(self, ctx) -> bool:
+    # pylint: disable=too-many-positional-arguments
+    def _pull_window(self, ctx, chat_type, ts_field, window, keys: Dict, resume: Dict, transform_args):
+        """pulls the search pages of a window, starting from resume, returns
+        the number of records written and the highest ts_field value among
+        them."""
+        next_url, pending_ids, rescan = resume["next_url"], resume["pending_ids"], resume["rescan"]
+        window_records, window_max_ts = 0, None
+        while True:
+            written, max_ts = 0, None
+            if pending_ids:
+                # the previous sync stopped part way through a page
+                chat_ids, pending_ids = pending_ids, []
+            else:
+                next_url, chat_ids, written, max_ts = self._search_page(
+                    ctx, chat_type, ts_field, window, next_url, keys, transform_args
+                )
+            if chat_ids or not self.search_only:
+                written, max_ts = self._sync_chats(ctx, chat_ids, ts_field, keys["pending_ids"], *transform_args)
+            window_records += written
+            if max_ts:
+                window_max_ts = max(window_max_ts, max_ts) if window_max_ts else max_ts
+            if not next_url:
+                if not rescan:
+                    return window_records, window_max_ts
+                rescan = False
+
+    def _search_page(self, ctx, chat_type, ts_field, window, next_url, keys: Dict, transform_args):
+        """requests the search page at next_url, or the first page of the
+        window, and checkpoints it before its chats are fetched. Returns the
+        url of the following page, the ids of the chats to fetch, and the
+        number of records written and their highest ts_field value in search
+        only mode."""
+        ctx.check_deadline()
+        start_dt, end_dt = window
+        if next_url:
+            search_resp = ctx.client.request(self.tap_stream_id, url=next_url)
+        else:
+            params = self.search_params(chat_type, ts_field, start_dt, end_dt)
+            search_resp = ctx.client.request(self.tap_stream_id, params=params, url_extra="/search")
+
+        written, max_ts, chat_ids = 0, None, []
+        if self.search_only:
+            # the page is written before the offset moves past it
+            written, max_ts = self.write_search_results(search_resp["results"], ts_field, *transform_args)
+        else:
+            chat_ids = [r["id"] for r in search_resp["results"]]
+        ctx.set_bookmark(keys["window_start"], start_dt)
+        ctx.set_bookmark(keys["next_url"], search_resp["next_url"])
+        ctx.set_bookmark(keys["pending_ids"], chat_ids or None)
+        ctx.write_state()
+        return search_resp["next_url"], chat_ids, written, max_ts
+
+    @staticmethod
+    def search_params(chat_type, ts_field, start_dt, end_dt):
+        start, end = start_dt.replace(tzinfo=None).isoformat(), end_dt.replace(tzinfo=None).isoformat()
+        return {"q": f"type:{chat_type} AND {ts_field}:[{start} TO {end}]"}
+
+    @staticmethod
+    def search_start(ctx, bookmark):
+        """chats changed after they ended are picked up by searching the last
+        chats_lookback_days before the bookmark again, the bookmark itself
+        never moves back."""
+        lookback_days = ctx.config.get("chats_lookback_days")
+        if not lookback_days:
+            return bookmark
+        lookback_start = strptime_to_utc(bookmark) - timedelta(days=float(lookback_days))
+        return max(lookback_start, strptime_to_utc(ctx.config["start_date"])).isoformat()
+
+    @staticmethod
+    def end_time(ctx):
+        """chats are synced up to now, or up to chats_end_date when a sync only
+        covers a shard of the history."""
+        end_date = ctx.config.get("chats_end_date")
+        if end_date:
+            return min(ctx.now, strptime_to_utc(end_date))
+        return ctx.now
+
+    def _rolling_resync(self, ctx, schema: Dict, stream_metadata: Dict, transformer: Transformer):
+        """Pulls the next slice of the chat history again, so the whole
+        history is refreshed over chats_full_sync_days with an even load
+        instead of all at once.
+
+        A run covers elapsed / chats_full_sync_days of the history between
+        start_date and the incremental bookmark, where elapsed is the time
+        since the previous run. The resync cursor starts over from start_date
+        once it reaches the incremental bookmark.
+        """
+        period = timedelta(days=float(ctx.config["chats_full_sync_days"]))
+        last_run = ctx.state.get("chats_resync_last_run")
+        elapsed = ctx.now - strptime_to_utc(last_run) if last_run else timedelta(days=1)
+        fraction = min(max(elapsed / period, 0.0), 1.0)
+        start_date = strptime_to_utc(ctx.config["start_date"])
+        for chat_type, ts_field in CHAT_TYPES:
+            cursor_key = [self.tap_stream_id, chat_type + ".resync_cursor"]
+            frontier = strptime_to_utc(ctx.update_start_date_bookmark([self.tap_stream_id, chat_type + "." + ts_field]))
+            cursor = strptime_to_utc(ctx.update_start_date_bookmark(cursor_key))
+            # last_run only moves once a run completes, so the slice of a
+            # resumed run still covers the windows left by the interrupted one
+            slice_end = min(frontier, cursor + (frontier - start_date) * fraction)
+            LOGGER.info("Rolling resync of %s chats from %s to %s", chat_type, cursor, slice_end)
+            self._pull(ctx, chat_type, ts_field, schema, stream_metadata, transformer, resync_end=slice_end)
+            if slice_end >= frontier:
+                LOGGER.info("Rolling resync of %s chats reached %s, starting over from start_date", chat_type, frontier)
+                ctx.set_bookmark(cursor_key, None)
+        ctx.state["chats_resync_last_run"] = ctx.now.isoformat()
+        ctx.write_state()
+
+    def should_run_full_sync(self, ctx) -> bool:
+        if ctx.config.get("chats_full_sync_mode") == "rolling":
+            return False
         sync_days = ctx.config.get("chats_full_sync_days")
+        if sync_days and ctx.state.get("chats_full_sync_started"):
+            LOGGER.info("Resuming full sync of chats started at %s", ctx.state["chats_full_sync_started"])
+            return False
         if sync_days:
             last_sync = ctx.state.get("chats_last_full_sync")
             if not last_sync:
@@ -178,13 +505,34 @@ class Chats(BaseStream):
                 return True
         return False
 
+    def start_full_sync(self, ctx):
+        """All chats are pulled again from the "start_date" in the config, the
+        start is recorded so a run stopped part way resumes the full sync
+        instead of starting it over."""
+        for chat_type, ts_field in CHAT_TYPES:
+            ctx.set_bookmark([self.tap_stream_id, chat_type + "." + ts_field], None)
+            self._clear_offsets(ctx, chat_type)
+        ctx.state["chats_full_sync_started"] = ctx.now.isoformat()
+        ctx.write_state()
+
+    def _clear_offsets(self, ctx, chat_type):
+        for key in ("next_url", "pending_ids", "window_start"):
+            ctx.set_bookmark([self.tap_stream_id, "offset", chat_type + "." + key], None)
+
     def sync(self, ctx, schema: Dict, stream_metadata: Dict, transformer: Transformer):
-        full_sync = self._should_run_full_sync(ctx)
+        self.seen_ids = dedup.from_config(ctx.config)
+        self.search_only = self.is_search_only(ctx.config, schema, stream_metadata)
+        if self.search_only and self.children:
+            LOGGER.info("Requesting the bulk chats, the selected child streams are not in the search results")
+            self.search_only = False
+        if self.search_only:
+            LOGGER.info("Emitting chats from the search results without the bulk request")
+        if self.should_run_full_sync(ctx):
+            self.start_full_sync(ctx)
         self._pull(
             ctx,
             "chat",
             "end_timestamp",
-            full_sync=full_sync,
             schema=schema,
             stream_metadata=stream_metadata,
             transformer=transformer,
@@ -193,14 +541,105 @@ class Chats(BaseStream):
             ctx,
             "offline_msg",
             "timestamp",
-            full_sync=full_sync,
             schema=schema,
             stream_metadata=stream_metadata,
             transformer=transformer,
         )
-        if full_sync:
-            ctx.state["chats_last_full_sync"] = ctx.now.isoformat()
+        if ctx.config.get("chats_full_sync_mode") == "rolling" and ctx.config.get("chats_full_sync_days"):
+            self._rolling_resync(ctx, schema, stream_metadata, transformer)
+        if "chats_full_sync_started" in ctx.state:
+            ctx.state["chats_last_full_sync"] = ctx.state.pop("chats_full_sync_started")
             ctx.write_state()
+        self.log_skipped()
+
+    def log_skipped(self):
+        """logs the chats skipped as already emitted, the bloom hits that
+        could not be confirmed as a warning since they may have been lost."""
+        if self.duplicates_skipped:
+            LOGGER.info("Skipped %s chats already emitted by this run", self.duplicates_skipped)
+        if self.seen_ids.unconfirmed:
+            LOGGER.warning(
+                "Skipped %s chats found in the bloom filter but not among the recent ids, "
+                "they may be false positives that were never emitted",
+                self.seen_ids.unconfirmed,
+            )
+
+
+class ChatChild(BaseStream):
+    """The object nested under parent_field of every bulk chat document, with
+    the chat's id as chat_id.
+
+    Child streams make no requests of their own, the chats stream writes
+    their records from the documents it fetches. Their schemas are the chats
+    sub-schemas of the same name.
+    """
+
+    parent_stream = "chats"
+    parent_field = None
+    key_properties = ["chat_id"]
+    forced_replication_method = "INCREMENTAL"
+
+    @classmethod
+    def load_schema(cls) -> Dict:
+        schema = load_schema(cls.tap_stream_id)
+        # the webpath entries are either objects or lists, only objects are emitted
+        schema = next((sub for sub in schema.get("anyOf", []) if "properties" in sub), schema)
+        schema["properties"]["chat_id"] = {"type": ["string"]}
+        return schema
+
+    def child_records(self, chat: Dict) -> List:
+        value = chat.get(self.parent_field)
+        return [dict(value, chat_id=chat["id"])] if isinstance(value, dict) else []
+
+
+class ChatChildList(ChatChild):
+    """The entries of the list under parent_field of every bulk chat
+    document, keyed by the chat's id and their position in the list."""
+
+    key_properties = ["chat_id", "index"]
+
+    @classmethod
+    def load_schema(cls) -> Dict:
+        schema = super().load_schema()
+        schema["properties"]["index"] = {"type": ["integer"]}
+        return schema
+
+    def child_records(self, chat: Dict) -> List:
+        return [
+            dict(entry, chat_id=chat["id"], index=index)
+            for index, entry in enumerate(chat.get(self.parent_field) or [])
+            if isinstance(entry, dict)
+        ]
+
+
+class ChatHistory(ChatChildList):
+    tap_stream_id = "chat_history"
+    parent_field = "history"
+
+
+class ChatWebpath(ChatChildList):
+    tap_stream_id = "chat_webpath"
+    parent_field = "webpath"
+
+
+class ChatConversion(ChatChildList):
+    tap_stream_id = "chat_conversion"
+    parent_field = "conversions"
+
+
+class ChatVisitor(ChatChild):
+    tap_stream_id = "chat_visitor"
+    parent_field = "visitor"
+
+
+class ChatResponseTime(ChatChild):
+    tap_stream_id = "chat_response_time"
+    parent_field = "response_time"
+
+
+class ChatCount(ChatChild):
+    tap_stream_id = "chat_count"
+    parent_field = "count"
 
 
 class Departments(BaseStream):
@@ -236,4 +675,10 @@ STREAMS = {
     Goals.tap_stream_id: Goals,
     Shortcuts.tap_stream_id: Shortcuts,
     Triggers.tap_stream_id: Triggers,
+    ChatHistory.tap_stream_id: ChatHistory,
+    ChatVisitor.tap_stream_id: ChatVisitor,
+    ChatWebpath.tap_stream_id: ChatWebpath,
+    ChatConversion.tap_stream_id: ChatConversion,
+    ChatResponseTime.tap_stream_id: ChatResponseTime,
+    ChatCount.tap_stream_id: ChatCount,
 }
@@ -1,3 +1,7 @@
+import copy
+import time
+from contextlib import ExitStack
+
 from singer import (
     Transformer,
     get_logger,
@@ -7,25 +11,112 @@ from singer import (
     write_state,
 )
 
+from .context import DeadlineReached
 from .streams import STREAMS
+from .transform import TransformPool
 
 LOGGER = get_logger()
 
 
+def selected_children(ctx, parent: str) -> list:
+    """returns the selected catalog streams written by the sync of parent."""
+    return [
+        stream
+        for stream in ctx.catalog.get_selected_streams(ctx.state)
+        if STREAMS[stream.tap_stream_id].parent_stream == parent
+    ]
+
+
+def sync_stream(ctx, stream, transformer: Transformer, children=(), emit_records=True):
+    """syncs a single selected catalog stream, together with the selected
+    child streams it writes. Without emit_records only the children are
+    written."""
+    tap_stream_id = stream.tap_stream_id
+    stream_schema = stream.schema.to_dict()
+    stream_metadata = metadata.to_map(stream.metadata)
+    stream_obj = STREAMS[tap_stream_id]()
+    LOGGER.info("Starting sync for stream: %s", tap_stream_id)
+    ctx.state = set_currently_syncing(ctx.state, tap_stream_id)
+    ctx.write_state()
+    if emit_records:
+        write_schema(tap_stream_id, stream_schema, stream_obj.key_properties, stream.replication_key)
+    if children:
+        stream_obj.emit_records = emit_records
+        for child in children:
+            child_obj = STREAMS[child.tap_stream_id]()
+            child_schema = child.schema.to_dict()
+            write_schema(child.tap_stream_id, child_schema, child_obj.key_properties, child.replication_key)
+            stream_obj.children.append((child_obj, child_schema, metadata.to_map(child.metadata)))
+    if ctx.output:
+        stream_obj.batch_writer = ctx.output.writer(tap_stream_id, stream_schema, stream_metadata)
+        for child_obj, child_schema, child_metadata in stream_obj.children:
+            child_obj.batch_writer = ctx.output.writer(child_obj.tap_stream_id, child_schema, child_metadata)
+    bookmarks_before = copy.deepcopy(ctx.bookmarks.get(tap_stream_id))
+    started = time.monotonic()
+    ctx.memory.start_stream()
+    stream_obj.transform_pool = TransformPool.from_config(ctx.config, stream_schema, stream_metadata)
+    try:
+        with ExitStack() as counters:
+            counters.enter_context(stream_obj.counter)
+            for child_obj, _, _ in stream_obj.children:
+                counters.enter_context(child_obj.counter)
+            stream_obj.sync(ctx, schema=stream_schema, stream_metadata=stream_metadata, transformer=transformer)
+    finally:
+        if stream_obj.transform_pool:
+            stream_obj.transform_pool.close()
+        if ctx.output:
+            ctx.output.checkpoint()
+        elapsed = time.monotonic() - started
+        LOGGER.info(
+            "Finished sync for stream: %s, %s records in %.1f seconds",
+            tap_stream_id,
+            stream_obj.record_count,
+            elapsed,
+        )
+        ctx.memory.report(tap_stream_id)
+        ctx.telemetry.observe_stream(tap_stream_id, stream_obj.record_count, elapsed)
+        for child_obj, _, _ in stream_obj.children:
+            LOGGER.info("Wrote %s records of child stream: %s", child_obj.record_count, child_obj.tap_stream_id)
+            ctx.telemetry.observe_stream(child_obj.tap_stream_id, child_obj.record_count, elapsed)
+        ctx.telemetry.observe_bookmarks(
+            tap_stream_id, bookmarks_before, copy.deepcopy(ctx.bookmarks.get(tap_stream_id))
+        )
+    ctx.write_state()
+
+
 def sync(ctx):
-    """performs sync for selected streams."""
+    """performs sync for selected streams.
+
+    Once max_runtime_seconds has elapsed no new stream, page or window is
+    started. The state then keeps the interrupted stream as currently_syncing
+    together with its offsets, so the next run resumes where this one stopped.
+    """
+    selected = list(ctx.catalog.get_selected_streams(ctx.state))
+    # child streams are written by their parent's sync, which runs without
+    # emitting its own records when only the children are selected
+    streams = [stream for stream in selected if not STREAMS[stream.tap_stream_id].parent_stream]
+    chats_children = selected_children(ctx, "chats")
+    if chats_children and not any(stream.tap_stream_id == "chats" for stream in streams):
+        streams.append(ctx.catalog.get_stream("chats"))
     with Transformer() as transformer:
-        for stream in ctx.catalog.get_selected_streams(ctx.state):
-            tap_stream_id = stream.tap_stream_id
-            stream_schema = stream.schema.to_dict()
-            stream_metadata = metadata.to_map(stream.metadata)
-            stream_obj = STREAMS[tap_stream_id]()
-            LOGGER.info("Starting sync for stream: %s", tap_stream_id)
-            ctx.state = set_currently_syncing(ctx.state, tap_stream_id)
-            ctx.write_state()
-            write_schema(tap_stream_id, stream_schema, stream_obj.key_properties, stream.replication_key)
-            stream_obj.sync(ctx, schema=stream_schema, stream_metadata=stream_metadata, transformer=transformer)
-            ctx.write_state()
+        for stream in streams:
+            if ctx.out_of_time():
+                LOGGER.info("Reached max_runtime_seconds, stopping before stream: %s", stream.tap_stream_id)
+                ctx.state = set_currently_syncing(ctx.state, stream.tap_stream_id)
+                break
+            try:
+                sync_stream(
+                    ctx,
+                    stream,
+                    transformer,
+                    children=chats_children if stream.tap_stream_id == "chats" else (),
+                    emit_records=stream in selected,
+                )
+            except DeadlineReached:
+                LOGGER.info("Reached max_runtime_seconds, stopping during stream: %s", stream.tap_stream_id)
+                break
+        else:
+            ctx.state = set_currently_syncing(ctx.state, None)
 
-    ctx.state = set_currently_syncing(ctx.state, None)
     write_state(ctx.state)
+    ctx.telemetry.write_summary({"subdomain": ctx.config.get("subdomain")})
@@ -0,0 +1,70 @@
+"""Keeps the tap running and polls for new chats on a fixed cadence.
+
+Enabled by ``tail_interval_seconds`` in the config. The first cycle is a
+regular sync of every selected stream, every following cycle only syncs the
+chats stream, from the bookmark left by the previous cycle up to the current
+time. The Context, its HTTP session and the catalog stay loaded between
+cycles, so a poll costs only the chat search and bulk requests.
+
+SIGTERM and SIGINT stop the tap once the page being processed is written, the
+state then resumes the interrupted cycle like a time budgeted sync.
+"""
+import signal
+import threading
+import time
+
+from singer import Transformer, get_logger, set_currently_syncing
+from singer.utils import now
+
+from .context import DeadlineReached
+from .sync import selected_children, sync, sync_stream
+
+LOGGER = get_logger()
+
+
+def _chats_entry(ctx):
+    for stream in ctx.catalog.get_selected_streams(ctx.state):
+        if stream.tap_stream_id == "chats":
+            return stream
+    return None
+
+
+def run(ctx, interval: float):
+    """syncs once, then polls chats every interval seconds until a stop
+    signal arrives or max_runtime_seconds elapses."""
+    stop = threading.Event()
+
+    def _stop(signum, _frame):
+        LOGGER.info("Received signal %s, stopping after the current page", signum)
+        stop.set()
+        # the running cycle stops at the next point the state can resume from
+        ctx.deadline = time.monotonic()
+
+    handlers = {signum: signal.signal(signum, _stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        sync(ctx)
+        chats = _chats_entry(ctx)
+        children = selected_children(ctx, "chats")
+        if chats is None and not children:
+            LOGGER.info("The chats stream is not selected, nothing to poll")
+            return
+        with Transformer() as transformer:
+            while not stop.wait(interval) and not ctx.out_of_time():
+                ctx.now = now()
+                try:
+                    sync_stream(
+                        ctx,
+                        chats or ctx.catalog.get_stream("chats"),
+                        transformer,
+                        children=children,
+                        emit_records=chats is not None,
+                    )
+                except DeadlineReached:
+                    break
+                ctx.state = set_currently_syncing(ctx.state, None)
+                ctx.write_state()
+                ctx.telemetry.maybe_write()
+    finally:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+    LOGGER.info("Stopped polling chats")
@@ -0,0 +1,270 @@
+import heapq
+import itertools
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from singer import get_logger, metrics
+
+LOGGER = get_logger()
+
+PREFIX = "tap_zendesk_chat"
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+SLOWEST_WINDOWS = 5
+
+
+def _labels(**labels):
+    """formats a label set, escaping values as required by the text
+    format."""
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in sorted(labels.items()):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Histogram:
+    """Fixed bucket histogram, quantiles are interpolated within the bucket
+    they fall in so memory stays constant regardless of the number of
+    observations."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[idx - 1] if idx else 0.0
+                if idx == len(self.buckets):
+                    # overflow bucket has no upper bound, report its lower bound
+                    return lower
+                return lower + (self.buckets[idx] - lower) * ((rank - seen) / count)
+            seen += count
+        return self.buckets[-1]
+
+    def cumulative(self):
+        """yields (upper bound, cumulative count) pairs including +Inf."""
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+
+def _render_histogram(endpoint: str, hist: Histogram) -> list:
+    """returns the bucket, count and sum lines of an endpoint's latency."""
+    lines = []
+    for bound, count in hist.cumulative():
+        le = "+Inf" if bound == float("inf") else repr(float(bound))
+        lines.append(f"{PREFIX}_request_duration_seconds_bucket{_labels(endpoint=endpoint, le=le)} {count}")
+    lines.append(f"{PREFIX}_request_duration_seconds_count{_labels(endpoint=endpoint)} {hist.count}")
+    lines.append(f"{PREFIX}_request_duration_seconds_sum{_labels(endpoint=endpoint)} {hist.sum}")
+    return lines
+
+
+def _render_quantiles(endpoint: str, hist: Histogram) -> list:
+    """returns the estimated quantile lines of an endpoint's latency."""
+    return [
+        f"{PREFIX}_request_duration_quantile_seconds{_labels(endpoint=endpoint, quantile=q)} {hist.quantile(q)}"
+        for q in QUANTILES
+    ]
+
+
+class Telemetry:  # pylint: disable=too-many-instance-attributes
+    """Aggregates request, backoff and record metrics for a run and exports
+    them as an OpenMetrics text file.
+
+    The file is written atomically so a node exporter textfile collector never
+    scrapes a partial file.
+    """
+
+    def __init__(self, path: str = None, interval: float = None, summary_path: str = None):
+        self.path = path
+        self.interval = interval
+        self.summary_path = summary_path
+        self.started = time.monotonic()
+        self.last_write = self.started
+        self.latency = defaultdict(Histogram)
+        self.responses = defaultdict(int)
+        self.rate_limited = defaultdict(int)
+        self.response_bytes = defaultdict(int)
+        self.retries = defaultdict(int)
+        self.hedges = defaultdict(int)
+        self.hedge_wins = defaultdict(int)
+        self.backoffs = 0
+        self.backoff_seconds = 0.0
+        self.records = defaultdict(int)
+        self.stream_seconds = defaultdict(float)
+        self.bookmarks = {}
+        self.windows = defaultdict(int)
+        self.slowest_windows = defaultdict(list)
+        self._tiebreak = itertools.count()
+
+    @classmethod
+    def from_config(cls, config: dict):
+        interval = config.get("metrics_interval_seconds")
+        return cls(
+            config.get("metrics_file"),
+            float(interval) if interval else None,
+            config.get("sync_summary_file"),
+        )
+
+    def observe_request(self, endpoint: str, status_code, seconds: float):
+        self.latency[endpoint].observe(seconds)
+        self.responses[(endpoint, status_code)] += 1
+        if status_code == 429:
+            self.rate_limited[endpoint] += 1
+        self.maybe_write()
+
+    def observe_bytes(self, endpoint: str, size: int):
+        self.response_bytes[endpoint] += size
+
+    def observe_backoff(self, seconds: float, endpoint: str = None):
+        self.backoffs += 1
+        self.backoff_seconds += seconds
+        if endpoint:
+            self.retries[endpoint] += 1
+
+    def observe_hedge(self, endpoint: str, won: bool):
+        """counts a duplicate request sent for a slow request, and whether
+        its response arrived first."""
+        self.hedges[endpoint] += 1
+        if won:
+            self.hedge_wins[endpoint] += 1
+
+    def observe_stream(self, stream: str, records: int, seconds: float):
+        self.records[stream] += records
+        self.stream_seconds[stream] += seconds
+        self.maybe_write()
+
+    def observe_bookmarks(self, stream: str, before, after):
+        self.bookmarks[stream] = {"start": before, "end": after}
+
+    def observe_window(self, stream: str, window: dict):
+        """counts a processed search window and keeps the slowest ones, the
+        window must carry its duration under "seconds"."""
+        self.windows[stream] += 1
+        slowest = self.slowest_windows[stream]
+        item = (window["seconds"], next(self._tiebreak), window)
+        if len(slowest) < SLOWEST_WINDOWS:
+            heapq.heappush(slowest, item)
+        else:
+            heapq.heappushpop(slowest, item)
+
+    def render(self) -> str:
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+
+        family("request_duration_seconds", "histogram", "HTTP request latency per endpoint.")
+        for endpoint, hist in sorted(self.latency.items()):
+            lines.extend(_render_histogram(endpoint, hist))
+
+        family("request_duration_quantile_seconds", "gauge", "Estimated HTTP request latency quantiles.")
+        for endpoint, hist in sorted(self.latency.items()):
+            lines.extend(_render_quantiles(endpoint, hist))
+
+        family("responses", "counter", "HTTP responses per endpoint and status code.")
+        for (endpoint, status), count in sorted(self.responses.items(), key=str):
+            lines.append(f"{PREFIX}_responses_total{_labels(endpoint=endpoint, status=status)} {count}")
+
+        family("rate_limited", "counter", "HTTP 429 responses per endpoint.")
+        for endpoint, count in sorted(self.rate_limited.items()):
+            lines.append(f"{PREFIX}_rate_limited_total{_labels(endpoint=endpoint)} {count}")
+
+        family("backoff", "counter", "Retries performed after a retryable response.")
+        lines.append(f"{PREFIX}_backoff_total {self.backoffs}")
+        family("backoff_sleep_seconds", "counter", "Total time slept before retries.")
+        lines.append(f"{PREFIX}_backoff_sleep_seconds_total {self.backoff_seconds}")
+
+        family("hedged_requests", "counter", "Duplicate requests sent for slow requests per endpoint.")
+        for endpoint, count in sorted(self.hedges.items()):
+            lines.append(f"{PREFIX}_hedged_requests_total{_labels(endpoint=endpoint)} {count}")
+        family("hedge_wins", "counter", "Duplicate requests answered before the original per endpoint.")
+        for endpoint, count in sorted(self.hedge_wins.items()):
+            lines.append(f"{PREFIX}_hedge_wins_total{_labels(endpoint=endpoint)} {count}")
+
+        family("records", "counter", "Records written per stream.")
+        for stream, count in sorted(self.records.items()):
+            lines.append(f"{PREFIX}_records_total{_labels(stream=stream)} {count}")
+        family("records_per_second", "gauge", "Record throughput per stream.")
+        for stream, count in sorted(self.records.items()):
+            seconds = self.stream_seconds[stream]
+            rate = count / seconds if seconds else 0.0
+            lines.append(f"{PREFIX}_records_per_second{_labels(stream=stream)} {rate}")
+
+        family("run_duration_seconds", "gauge", "Wall time since the tap started.")
+        lines.append(f"{PREFIX}_run_duration_seconds {time.monotonic() - self.started}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        """builds the machine-readable end of run summary."""
+        endpoints = {endpoint for endpoint, _ in self.responses}
+        streams = {}
+        for stream in sorted(endpoints | set(self.records) | set(self.bookmarks)):
+            streams[stream] = {
+                "records": self.records.get(stream, 0),
+                "requests": sum(n for (endpoint, _), n in self.responses.items() if endpoint == stream),
+                "retries": self.retries.get(stream, 0),
+                "hedges": self.hedges.get(stream, 0),
+                "bytes": self.response_bytes.get(stream, 0),
+                "seconds": round(self.stream_seconds.get(stream, 0.0), 3),
+                "bookmarks": self.bookmarks.get(stream),
+                "windows": self.windows.get(stream, 0),
+                "slowest_windows": [window for _, _, window in sorted(self.slowest_windows[stream], reverse=True)],
+            }
+        return {"seconds": round(time.monotonic() - self.started, 3), "streams": streams}
+
+    def write_summary(self, tags: dict = None):
+        """emits the summary as a singer metric and writes it to the summary
+        file, if one is configured."""
+        summary = self.summary()
+        metrics.log(LOGGER, metrics.Point("summary", "sync_summary", summary, tags or {}))
+        if self.summary_path:
+            tmp_path = f"{self.summary_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as out:
+                json.dump(dict(summary, tags=tags or {}), out, indent=2, default=str)
+            os.replace(tmp_path, self.summary_path)
+
+    def write(self):
+        """writes the metrics file, if one is configured."""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            out.write(self.render())
+        os.replace(tmp_path, self.path)
+        self.last_write = time.monotonic()
+
+    def flush(self):
+        """writes the metrics file, logging a file that cannot be written
+        instead of failing the sync."""
+        try:
+            self.write()
+        except OSError as err:
+            LOGGER.warning("Unable to write metrics file %s: %s", self.path, err)
+
+    def maybe_write(self):
+        """writes the metrics file when the configured interval has
+        elapsed."""
+        if self.path and self.interval and time.monotonic() - self.last_write >= self.interval:
+            self.flush()
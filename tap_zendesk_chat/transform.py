@@ -0,0 +1,72 @@
+from typing import Dict, List
+
+from singer import Transformer, get_logger
+
+LOGGER = get_logger()
+# the smallest chunk worth sending to a worker, below it pickling costs more
+# than the transformation saves
+DEFAULT_CHUNK_SIZE = 20
+
+# set in every worker process by _init_worker
+_WORKER = {}
+
+
+def _init_worker(schema: Dict, stream_metadata: Dict):
+    _WORKER["transformer"] = Transformer()
+    _WORKER["schema"] = schema
+    _WORKER["metadata"] = stream_metadata
+
+
+def _transform_chunk(records: List) -> List:
+    transformer = _WORKER["transformer"]
+    return [transformer.transform(rec, _WORKER["schema"], metadata=_WORKER["metadata"]) for rec in records]
+
+
+class TransformPool:
+    """Transforms pages of records of one stream in a pool of worker
+    processes, each holding a warm Transformer with the stream's schema and
+    metadata.
+
+    A page is split into one chunk per worker, of at least chunk_size
+    records, and the chunks are transformed in parallel and returned in their
+    original order. The processes are only started once a page is large
+    enough to be split, smaller pages are transformed in the calling process.
+    """
+
+    def __init__(self, workers: int, schema: Dict, stream_metadata: Dict, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.workers = workers
+        self.schema = schema
+        self.stream_metadata = stream_metadata
+        self.chunk_size = chunk_size
+        self.transformer = Transformer()
+        self.executor = None
+
+    @classmethod
+    def from_config(cls, config: Dict, schema: Dict, stream_metadata: Dict):
+        workers = int(config.get("transform_workers", 0))
+        if workers < 2:
+            return None
+        return cls(workers, schema, stream_metadata, int(config.get("transform_chunk_size", DEFAULT_CHUNK_SIZE)))
+
+    def transform(self, records: List) -> List:
+        if len(records) < 2 * self.chunk_size:
+            return [self.transformer.transform(rec, self.schema, metadata=self.stream_metadata) for rec in records]
+        if self.executor is None:
+            # multiprocessing is only imported once the workers are needed
+            # pylint: disable-next=import-outside-toplevel
+            from concurrent.futures import ProcessPoolExecutor
+
+            LOGGER.info("Starting %s transform worker processes", self.workers)
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self.schema, self.stream_metadata)
+            )
+        size = max(self.chunk_size, -(-len(records) // self.workers))
+        bounds = range(0, len(records) + size, size)
+        chunks = [records[start:stop] for start, stop in zip(bounds, bounds[1:])]
+        return [record for chunk in self.executor.map(_transform_chunk, chunks) for record in chunk]
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        self.transformer.log_warning()
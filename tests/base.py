@@ -17,6 +17,7 @@ class ZendeskChatBaseTest(unittest.TestCase):
     REPLICATION_METHOD = "forced-replication-method"
     INCREMENTAL = "INCREMENTAL"
     FULL = "FULL_TABLE"
+    PARENT = "parent-tap-stream-id"
     START_DATE_FORMAT = "%Y-%m-%dT00:00:00Z"
 
     def __init__(self, *args, **kwargs):
@@ -78,6 +79,18 @@ class ZendeskChatBaseTest(unittest.TestCase):
             self.REPLICATION_METHOD: self.INCREMENTAL,
         }
 
+        chat_child = {
+            self.PRIMARY_KEYS: {"chat_id"},
+            self.REPLICATION_METHOD: self.INCREMENTAL,
+            self.PARENT: "chats",
+        }
+
+        chat_child_list = {
+            self.PRIMARY_KEYS: {"chat_id", "index"},
+            self.REPLICATION_METHOD: self.INCREMENTAL,
+            self.PARENT: "chats",
+        }
+
         return {
             "agents": default,
             "chats": chats_rep_key,
@@ -87,12 +100,22 @@ class ZendeskChatBaseTest(unittest.TestCase):
             "departments": default,
             "goals": default,
             "account": account_rep_key,
+            "chat_history": chat_child_list,
+            "chat_webpath": chat_child_list,
+            "chat_conversion": chat_child_list,
+            "chat_visitor": chat_child,
+            "chat_response_time": chat_child,
+            "chat_count": chat_child,
         }
 
     def expected_streams(self) -> Set:
         """A set of expected stream names."""
         return set(self.expected_metadata().keys())
 
+    def expected_child_streams(self) -> Set:
+        """The streams written by the chats sync from the bulk chats."""
+        return {stream for stream, properties in self.expected_metadata().items() if properties.get(self.PARENT)}
+
     def expected_primary_keys(self) -> Dict:
         """return a dictionary with key of table name and value as a set of
         primary key fields."""
@@ -39,7 +39,7 @@ class TestZendeskChatAutomaticFields(ZendeskChatBaseTest):
         returns {"chat_id":"type"}
         """
 
-        expected_streams = self.expected_streams()
+        expected_streams = self.expected_streams() - self.expected_child_streams()
         menagerie.set_state(conn_id, {})
         found_catalogs = self.run_and_verify_check_mode(conn_id)
         catalog_entries = [catalog for catalog in found_catalogs if catalog.get("stream_name") in expected_streams]
@@ -59,7 +59,7 @@ class TestZendeskChatAutomaticFields(ZendeskChatBaseTest):
         - Verify that all replicated records have unique primary key values.
         """
 
-        expected_streams = self.expected_streams()
+        expected_streams = self.expected_streams() - self.expected_child_streams()
 
         conn_id = connections.ensure_connection(self)
         found_catalogs = self.run_and_verify_check_mode(conn_id)
@@ -35,7 +35,7 @@ class TestZendeskChatBookmarks(ZendeskChatBaseTest):
         For EACH stream that is incrementally replicated there are multiple rows of data with
             different values for the replication key
         """
-        expected_streams = self.expected_streams()
+        expected_streams = self.expected_streams() - self.expected_child_streams()
 
         # Testing against ads insights objects
         self.start_date = self.get_properties()["start_date"]
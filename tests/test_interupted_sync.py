@@ -33,7 +33,7 @@ class TestZendeskChatDiscoveryInteruptibleSync(ZendeskChatBaseTest):
         - Verify the yet-to-be-synced streams are replicated following the interrupted stream in the resuming sync.
         """
 
-        expected_streams = self.expected_streams()
+        expected_streams = self.expected_streams() - self.expected_child_streams()
         expected_replication_methods = self.expected_replication_method()
 
         # instantiate connection
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+import requests
+from singer import Transformer
+from singer.utils import strptime_to_utc
+
+from tap_zendesk_chat import async_sync
+from tap_zendesk_chat.async_http import AsyncClient, aiohttp
+from tap_zendesk_chat.context import Context
+from tap_zendesk_chat.streams import Agents, Chats
+
+
+class FakeAsyncClient:
+    """answers every search window with one chat ending in that window,
+    windows further back in time respond later."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def request(self, tap_stream_id, params=None, url=None, url_extra=""):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if "ids" in params:
+                ids = params["ids"].split(",")
+                return {"docs": {chat_id: {"id": chat_id, "end_timestamp": chat_id} for chat_id in ids}}
+            start = params["q"].split("[")[1].split(" TO ")[0]
+            await asyncio.sleep(0.01 if start.startswith("2022-01-01") else 0)
+            return {"results": [{"id": start + "Z"}], "next_url": None}
+        finally:
+            self.in_flight -= 1
+
+
+class TestAsyncChats(unittest.TestCase):
+    config = {
+        "start_date": "2022-01-01T00:00:00Z",
+        "access_token": "",
+        "chat_search_interval_days": 1,
+        "async_window_concurrency": 4,
+    }
+
+    @mock.patch("singer.write_records")
+    def test_windows_fan_out_and_bookmark_in_order(self, mocked_write_records):
+        """tests windows are searched concurrently up to the configured limit
+        and the bookmark ends at the latest chat."""
+        ctx = Context(self.config, {}, {})
+        ctx.now = strptime_to_utc("2022-01-09T00:00:00Z")
+        aclient = FakeAsyncClient()
+        stream = Chats()
+        bookmarks = []
+        window_starts = []
+
+        def write_state():
+            bookmarks.append(ctx.bookmarks["chats"]["chat.end_timestamp"])
+            window_starts.append(ctx.bookmarks["chats"]["offset"]["chat.window_start"])
+
+        with mock.patch.object(ctx, "write_state", side_effect=write_state):
+            transform_args = ({}, {}, Transformer())
+            asyncio.run(async_sync.pull_chats(stream, ctx, aclient, "chat", "end_timestamp", transform_args))
+
+        written = [call.args[1][0]["id"] for call in mocked_write_records.call_args_list]
+        self.assertEqual(4, aclient.max_in_flight)
+        # the window start points at the first window not completed yet
+        self.assertEqual("2022-01-02T00:00:00+00:00", window_starts[0])
+        self.assertIsNone(window_starts[-1])
+        self.assertEqual(8, len(written))
+        self.assertNotEqual("2022-01-01T00:00:00Z", written[0])
+        self.assertEqual(sorted(bookmarks), bookmarks)
+        self.assertEqual("2022-01-08T00:00:00Z", bookmarks[-1])
+
+
+@unittest.skipUnless(aiohttp, "aiohttp is not installed")
+class TestAsyncSinceId(unittest.TestCase):
+    config = {"start_date": "2022-01-01T00:00:00Z", "access_token": "", "adaptive_page_limits": True}
+
+    @mock.patch("singer.write_records")
+    def test_shrinks_after_server_errors(self, mocked_write_records):
+        """tests a server error carries its status to the page limit, which
+        shrinks and retries the page like the sync does."""
+        ctx = Context(dict(self.config, agents_page_limit=80), {}, {})
+        records = [{"id": idx} for idx in range(1, 101)]
+        limits = []
+
+        async def fetch(url, params):
+            limits.append(params["limit"])
+            if params["limit"] > 40:
+                return 503, b""
+            page = [rec for rec in records if rec["id"] >= params["since_id"]][: params["limit"]]
+            return 200, json.dumps(page).encode()
+
+        aclient = AsyncClient(ctx.client)
+        stream = Agents()
+        with mock.patch.object(aclient, "_fetch", side_effect=fetch), mock.patch.object(ctx, "write_state"):
+            asyncio.run(async_sync.sync_since_id(stream, ctx, aclient, {}, {}, Transformer()))
+
+        self.assertEqual(100, stream.record_count)
+        self.assertEqual([80, 40, 40, 40, 20], limits)
+
+    def test_connection_errors_are_requests_errors(self):
+        aclient = AsyncClient(Context(self.config, {}, {}).client)
+        aclient.session = mock.Mock()
+        aclient.session.get.side_effect = aiohttp.ClientConnectionError("reset")
+        with self.assertRaises(requests.ConnectionError):
+            asyncio.run(aclient._fetch("https://www.zopim.com/api/v2/agents", {}))
@@ -82,3 +82,19 @@ class TestAccountEndpointAuthorized(unittest.TestCase):
 
         expected_error_message = "404 Client Error: Not Found for url:"
         self.assertIn(expected_error_message, str(e.exception))
+
+
+class TestDiscoverWithoutAccessChecks(unittest.TestCase):
+    @mock.patch("tap_zendesk_chat.http.Client.request")
+    def test_check_access_false_makes_no_requests(self, mock_request):
+        """a sync without a catalog discovers without calling the API."""
+        catalog = tap_zendesk_chat.discover(Args().config, check_access=False)
+        mock_request.assert_not_called()
+        self.assertIn("account", [stream.tap_stream_id for stream in catalog.streams])
+
+    @mock.patch("tap_zendesk_chat.http.Client.request")
+    def test_offline_discovery_makes_no_requests(self, mock_request):
+        config = dict(Args().config, offline_discovery=True)
+        catalog = tap_zendesk_chat.discover(config)
+        mock_request.assert_not_called()
+        self.assertIn("chats", [stream.tap_stream_id for stream in catalog.streams])
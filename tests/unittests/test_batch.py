@@ -0,0 +1,130 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from singer import Transformer, metadata
+
+from tap_zendesk_chat import batch
+from tap_zendesk_chat.discover import discover
+from tap_zendesk_chat.http import InvalidConfigurationError
+
+CHAT = {
+    "id": "1",
+    "type": "chat",
+    "end_timestamp": "2022-01-02T10:00:00Z",
+    "unread": True,
+    "tags": ["a", "b"],
+    "session": {"browser": "firefox"},
+    "history": [{"msg": "hi", "timestamp": "2022-01-02T09:00:00Z", "msg_id": 7, "department_id": "3"}],
+    "webpath": [{"to": "/", "timestamp": "2022-01-02T08:00:00Z"}],
+    "count": {"total": 1},
+}
+
+
+@unittest.skipUnless(batch.pa, "pyarrow is not installed")
+class TestBatchOutput(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        entry = discover(None).get_stream("chats")
+        self.schema = entry.schema.to_dict()
+        self.metadata = metadata.to_map(entry.metadata)
+        self.record = Transformer().transform(CHAT, self.schema, metadata=self.metadata)
+
+    def messages(self, stdout):
+        return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+    def test_typed_columns(self):
+        """tests the chats columns are typed from the schema and survive the
+        round trip."""
+        output = batch.BatchOutput("parquet", self.output_dir)
+        writer = output.writer("chats", self.schema, self.metadata)
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            writer.write([self.record])
+            output.checkpoint()
+
+        [message] = self.messages(stdout)
+        self.assertEqual("BATCH", message["type"])
+        self.assertEqual({"format": "parquet", "compression": "snappy"}, message["encoding"])
+        table = batch.pq.read_table(message["manifest"][0][len("file://") :])
+        self.assertEqual(str(table.schema.field("end_timestamp").type), "timestamp[us, tz=UTC]")
+        self.assertEqual(str(table.schema.field("unread").type), "string")
+        row = table.to_pylist()[0]
+        self.assertEqual("1", row["id"])
+        self.assertEqual(2022, row["end_timestamp"].year)
+        self.assertEqual(["a", "b"], row["tags"])
+        self.assertEqual('{"browser": "firefox"}', row["session"])
+        self.assertEqual("hi", row["history"][0]["msg"])
+        self.assertEqual("7", row["history"][0]["msg_id"])
+        self.assertEqual(1, row["count"]["total"])
+        self.assertEqual([], [name for name in os.listdir(self.output_dir) if name.endswith(".tmp")])
+
+    def test_state_waits_for_the_files(self):
+        """tests the state is held back until the records before it are in a
+        finished file, and files rotate at batch_file_rows. The full file is
+        finished with its last row group, so the following state is written
+        right away."""
+        output = batch.BatchOutput("arrow", self.output_dir, row_group_size=2, file_rows=4)
+        writer = output.writer("chats", self.schema, self.metadata)
+        self.assertIsNone(output.writer("agents", {}, {}))
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            output.write_state({"bookmarks": {"chats": 0}})
+            writer.write([self.record])
+            output.write_state({"bookmarks": {"chats": 1}})
+            writer.write([self.record] * 3)
+            output.write_state({"bookmarks": {"chats": 4}})
+            writer.write([self.record])
+            output.write_state({"bookmarks": {"chats": 5}})
+            output.checkpoint()
+
+        types = [(message["type"], message.get("value")) for message in self.messages(stdout)]
+        self.assertEqual(
+            [
+                ("STATE", {"bookmarks": {"chats": 0}}),
+                ("BATCH", None),
+                ("STATE", {"bookmarks": {"chats": 1}}),
+                ("STATE", {"bookmarks": {"chats": 4}}),
+                ("BATCH", None),
+                ("STATE", {"bookmarks": {"chats": 5}}),
+            ],
+            types,
+        )
+        files = sorted(name for name in os.listdir(self.output_dir))
+        self.assertEqual(2, len(files))
+        with batch.pa.ipc.open_file(os.path.join(self.output_dir, files[0])) as reader:
+            self.assertEqual(4, reader.read_all().num_rows)
+
+    def test_held_state_finishes_files(self):
+        """tests the open files are finished and the state written once a
+        state has been held back for checkpoint_seconds, before the file is
+        full."""
+        output = batch.BatchOutput("arrow", self.output_dir, file_rows=1000, checkpoint_seconds=60)
+        writer = output.writer("chats", self.schema, self.metadata)
+        stdout = io.StringIO()
+        with redirect_stdout(stdout), mock.patch.object(batch.time, "monotonic", side_effect=[0, 30, 60]):
+            writer.write([self.record])
+            output.write_state({"bookmarks": {"chats": 1}})
+            writer.write([self.record])
+            output.write_state({"bookmarks": {"chats": 2}})
+            writer.write([self.record])
+            output.write_state({"bookmarks": {"chats": 3}})
+
+        types = [(message["type"], message.get("value")) for message in self.messages(stdout)]
+        self.assertEqual([("BATCH", None), ("STATE", {"bookmarks": {"chats": 3}})], types)
+        self.assertIsNone(output.held_since)
+        self.assertEqual(set(), output.pending_writers)
+
+    def test_config(self):
+        self.assertIsNone(batch.BatchOutput.from_config({}))
+        with self.assertRaises(InvalidConfigurationError):
+            batch.BatchOutput.from_config({"output_format": "parquet"})
+        with self.assertRaises(InvalidConfigurationError):
+            batch.BatchOutput.from_config({"output_format": "csv", "output_dir": self.output_dir})
+        with mock.patch.object(batch, "pa", None):
+            with self.assertRaises(InvalidConfigurationError):
+                batch.BatchOutput.from_config({"output_format": "parquet", "output_dir": self.output_dir})
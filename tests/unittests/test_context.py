@@ -1,6 +1,12 @@
 import unittest
+from unittest import mock
 
-from tap_zendesk_chat.context import Context
+from singer import StateMessage, metadata
+from singer.utils import strptime_to_utc
+
+from tap_zendesk_chat.context import Context, DeadlineReached
+from tap_zendesk_chat.discover import discover
+from tap_zendesk_chat.sync import sync
 
 
 class TestContextFunctions(unittest.TestCase):
@@ -47,3 +53,59 @@ class TestContextFunctions(unittest.TestCase):
 
         self.context_client.set_bookmark(["account"], {"last_created": "2022-07-05"})
         self.assertEqual({"last_created": "2022-07-05"}, self.context_client.state["bookmarks"]["account"])
+
+
+class TestDeadline(unittest.TestCase):
+    @mock.patch("time.monotonic", return_value=100.0)
+    def test_check_deadline(self, mocked_monotonic):
+        """tests the deadline is only enforced when max_runtime_seconds is
+        configured and has elapsed."""
+        config = {"start_date": "2022-01-01", "access_token": ""}
+        unlimited = Context(config, {}, {})
+        limited = Context(dict(config, max_runtime_seconds=60), {}, {})
+
+        mocked_monotonic.return_value = 159.0
+        limited.check_deadline()
+        mocked_monotonic.return_value = 160.0
+        unlimited.check_deadline()
+        with self.assertRaises(DeadlineReached):
+            limited.check_deadline()
+
+    @mock.patch("singer.messages.write_message")
+    def test_sync_stops_mid_chats(self, mocked_write_message):
+        """tests a sync running out of time after the first search page stops
+        before the next page and the following streams, and its last state
+        resumes chats from the next page."""
+        catalog = discover(None)
+        for tap_stream_id in ("chats", "departments"):
+            entry = catalog.get_stream(tap_stream_id)
+            entry.metadata = metadata.to_list(metadata.write(metadata.to_map(entry.metadata), (), "selected", True))
+        config = {
+            "start_date": "2022-01-01T00:00:00Z",
+            "access_token": "",
+            "chat_search_interval_days": 10,
+            "max_runtime_seconds": 3600,
+        }
+        ctx = Context(config, {}, catalog)
+        ctx.now = strptime_to_utc("2022-01-06T00:00:00Z")
+        requested = []
+
+        def request(tap_stream_id, params=None, url=None, url_extra=""):
+            requested.append(tap_stream_id)
+            if params and "ids" in params:
+                return {"docs": {"1": {"id": "1", "end_timestamp": "2022-01-02T00:00:00Z"}}}
+            # the run is out of time once the first search page is served
+            ctx.deadline = 0
+            return {"results": [{"id": "1"}], "next_url": "https://next"}
+
+        with mock.patch.object(ctx.client, "request", side_effect=request):
+            sync(ctx)
+
+        self.assertEqual(["chats", "chats"], requested)
+        messages = [call.args[0] for call in mocked_write_message.call_args_list]
+        states = [message.value for message in messages if isinstance(message, StateMessage)]
+        self.assertEqual("chats", states[-1]["currently_syncing"])
+        offset = states[-1]["bookmarks"]["chats"]["offset"]
+        self.assertEqual("https://next", offset["chat.next_url"])
+        self.assertEqual("2022-01-01T00:00:00+00:00", offset["chat.window_start"])
+        self.assertIsNone(offset["chat.pending_ids"])
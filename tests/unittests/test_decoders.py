@@ -0,0 +1,28 @@
+import unittest
+from unittest import mock
+
+from tap_zendesk_chat import decoders
+from tap_zendesk_chat.http import Client, InvalidConfigurationError
+
+
+class TestDecoders(unittest.TestCase):
+    body = '{"docs": {"1": {"msg": "héllo"}}}'.encode("utf-8")
+
+    def test_decoders_accept_bytes(self):
+        """tests every available decoder decodes the raw response bytes to the
+        same value."""
+        for loads in decoders.DECODERS.values():
+            self.assertEqual({"docs": {"1": {"msg": "héllo"}}}, loads(self.body))
+
+    def test_default_falls_back_to_stdlib(self):
+        """tests the standard library is used when no faster library is
+        installed."""
+        with mock.patch.dict(decoders.DECODERS, {"json": decoders.json.loads}, clear=True):
+            self.assertIs(decoders.json.loads, decoders.get_decoder())
+
+    def test_unknown_decoder(self):
+        """tests an unknown json_decoder is reported as a configuration
+        error."""
+        self.assertIsNone(decoders.get_decoder("simdjson"))
+        with self.assertRaises(InvalidConfigurationError):
+            Client({"access_token": "", "json_decoder": "simdjson"})
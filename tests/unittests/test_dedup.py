@@ -0,0 +1,47 @@
+import unittest
+
+from tap_zendesk_chat import dedup
+from tap_zendesk_chat.http import InvalidConfigurationError
+
+
+class TestDedup(unittest.TestCase):
+    def test_lru_drops_least_recently_used(self):
+        seen = dedup.LRUSet(max_ids=2)
+        seen.add("a")
+        seen.add("b")
+        self.assertIn("a", seen)
+        seen.add("c")
+        self.assertNotIn("b", seen)
+        self.assertIn("a", seen)
+        self.assertEqual(2, len(seen))
+
+    def test_bloom_has_no_false_negatives(self):
+        seen = dedup.BloomFilter(capacity=1000, error_rate=0.01)
+        ids = [f"chat-{idx}" for idx in range(1000)]
+        for chat_id in ids:
+            seen.add(chat_id)
+        self.assertTrue(all(chat_id in seen for chat_id in ids))
+        false_positives = sum(f"other-{idx}" in seen for idx in range(10000))
+        self.assertLess(false_positives, 300)
+        self.assertLess(len(seen.bits), 1300)
+
+    def test_bloom_confirms_recent_ids(self):
+        """tests hits among the recent ids are exact and the older ones are
+        counted and logged as possible false positives."""
+        seen = dedup.BloomFilter(capacity=1000, error_rate=0.01, confirm_ids=2)
+        for chat_id in ("a", "b", "c"):
+            seen.add(chat_id)
+        self.assertIn("c", seen)
+        self.assertEqual(0, seen.unconfirmed)
+        with self.assertLogs(level="WARNING") as logs:
+            self.assertIn("a", seen)
+        self.assertEqual(1, seen.unconfirmed)
+        self.assertIn("Skipping chat a", logs.output[0])
+
+    def test_from_config(self):
+        self.assertIsInstance(dedup.from_config({}), dedup.LRUSet)
+        seen = dedup.from_config({"chats_dedup_mode": "bloom", "chats_dedup_max_ids": "50"})
+        self.assertIsInstance(seen, dedup.BloomFilter)
+        self.assertEqual(dedup.DEFAULT_CONFIRM_IDS, seen.recent.max_ids)
+        with self.assertRaises(InvalidConfigurationError):
+            dedup.from_config({"chats_dedup_mode": "exact"})
@@ -0,0 +1,119 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from tap_zendesk_chat import http2
+from tap_zendesk_chat.hedge import Hedger
+from tap_zendesk_chat.http import Client
+from tap_zendesk_chat.telemetry import Telemetry
+
+
+class TestHedger(unittest.TestCase):
+    def setUp(self):
+        self.telemetry = Telemetry()
+        self.rate_limiter = mock.Mock()
+        self.hedger = Hedger(self.telemetry, self.rate_limiter, percentile=0.95, min_samples=20, min_delay=0.05)
+
+    def warm_up(self, endpoint="chats", seconds=0.01):
+        for _ in range(20):
+            self.telemetry.observe_request(endpoint, 200, seconds)
+
+    def sender(self, *calls):
+        """returns a send function whose nth call sleeps and then returns or
+        raises calls[n]."""
+        count = iter(range(len(calls)))
+        lock = threading.Lock()
+
+        def send():
+            with lock:
+                seconds, result = calls[next(count)]
+            time.sleep(seconds)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        return send
+
+    def test_delay_needs_samples(self):
+        self.assertIsNone(self.hedger.delay("chats"))
+        self.warm_up(seconds=2.0)
+        self.assertGreaterEqual(self.hedger.delay("chats"), 1.0)
+        self.assertIsNone(self.hedger.delay("agents"))
+
+    def test_fast_request_is_not_hedged(self):
+        self.warm_up()
+        self.assertEqual("a", self.hedger.send("chats", self.sender((0, "a"))))
+        self.rate_limiter.acquire.assert_not_called()
+        self.assertEqual(0, self.telemetry.hedges["chats"])
+
+    def test_slow_request_is_hedged(self):
+        """tests the duplicate's response is used when it arrives first, it
+        costs a rate limiter slot and the slower response is closed."""
+        self.warm_up()
+        slow, fast = mock.Mock(), mock.Mock()
+        self.assertIs(fast, self.hedger.send("chats", self.sender((0.3, slow), (0, fast))))
+        self.rate_limiter.acquire.assert_called_once_with()
+        self.assertEqual(1, self.telemetry.hedges["chats"])
+        self.assertEqual(1, self.telemetry.hedge_wins["chats"])
+        for _ in range(50):
+            if slow.close.called:
+                break
+            time.sleep(0.02)
+        slow.close.assert_called_once_with()
+        fast.close.assert_not_called()
+
+    def test_failed_request_waits_for_the_other(self):
+        self.warm_up()
+        response = mock.Mock()
+        send = self.sender((0.1, requests.ConnectionError()), (0.2, response))
+        self.assertIs(response, self.hedger.send("chats", send))
+        with self.assertRaises(requests.RequestException):
+            self.hedger.send("chats", self.sender((0.1, requests.ConnectionError()), (0.15, requests.Timeout())))
+
+
+class TestClientHedging(unittest.TestCase):
+    def test_client_hedges_only_when_configured(self):
+        self.assertIsNone(Client({"access_token": ""}).hedger)
+        session = mock.Mock()
+        session.get.return_value = mock.Mock(status_code=200, content=b"[]")
+        client = Client({"access_token": "", "hedge_requests": True}, session=session)
+        self.assertEqual([], client.request("agents"))
+        self.assertEqual(1, client.telemetry.latency["agents"].count)
+
+    @unittest.skipUnless(http2.httpx, "httpx is not installed")
+    def test_hedging_over_http2_reuses_clients(self):
+        """tests hedged requests over HTTP/2 reuse the httpx clients of the
+        hedge workers and closing the client closes them."""
+        count = iter(range(1000))
+
+        def handler(request):
+            if next(count) % 10 == 9:
+                time.sleep(0.2)
+            return http2.httpx.Response(200, json=[])
+
+        httpx_client_class = http2.httpx.Client
+
+        def httpx_client(**kwargs):
+            return httpx_client_class(transport=http2.httpx.MockTransport(handler))
+
+        config = {
+            "access_token": "",
+            "http2": True,
+            "hedge_requests": True,
+            "hedge_min_samples": 1,
+            "hedge_min_delay_seconds": 0.05,
+            "hedge_workers": 3,
+        }
+        client = Client(config)
+        with mock.patch.object(http2.httpx, "Client", side_effect=httpx_client):
+            for _ in range(50):
+                self.assertEqual([], client.request("agents"))
+        clients = list(client.session.clients)
+        self.assertGreater(client.telemetry.hedges["agents"], 0)
+        # the hedge workers and the calling thread
+        self.assertLessEqual(len(clients), 4)
+        client.close()
+        self.assertTrue(all(session.is_closed for session in clients))
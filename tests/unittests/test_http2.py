@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+
+from tap_zendesk_chat import http2
+from tap_zendesk_chat.async_http import AsyncClient
+from tap_zendesk_chat.http import Client, InvalidConfigurationError
+
+
+class TestHttp2Transport(unittest.TestCase):
+    def test_missing_httpx(self):
+        with mock.patch.object(http2, "httpx", None):
+            with self.assertRaises(InvalidConfigurationError):
+                Client({"access_token": "", "http2": True})
+
+    @unittest.skipUnless(http2.httpx, "httpx is not installed")
+    def test_request_and_errors(self):
+        """tests the HTTP/2 session decodes responses like requests and raises
+        requests' HTTPError for error statuses."""
+
+        def handler(request):
+            if request.url.path.endswith("/departments"):
+                return http2.httpx.Response(200, json=[{"id": 1}])
+            return http2.httpx.Response(404)
+
+        client = Client({"access_token": "", "http2": True})
+        client.session.local.client = http2.httpx.Client(transport=http2.httpx.MockTransport(handler))
+        self.assertEqual([{"id": 1}], client.request("departments"))
+        with self.assertRaises(requests.HTTPError):
+            client.request("goals")
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """redirects /api/v2/old to /api/v2/agents, which answers after a
+    delay."""
+
+    delay = 0.3
+
+    def do_GET(self):
+        if self.path.startswith("/api/v2/old"):
+            self.send_response(302)
+            self.send_header("Location", "/api/v2/agents")
+            self.end_headers()
+            return
+        time.sleep(self.delay)
+        body = b'[{"id": 1}]'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@unittest.skipUnless(http2.httpx, "httpx is not installed")
+class TestHttp2ClientOptions(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/v2/old"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_slow_redirected_response(self):
+        """tests the clients follow redirects and wait for slow responses like
+        requests, httpx defaults to a 5 second timeout."""
+        client = Client({"access_token": "token", "http2": True})
+        self.assertEqual([{"id": 1}], client.request("agents", url=self.url))
+        self.assertIsNone(client.session.client.timeout.read)
+
+        async def fetch():
+            async with AsyncClient(client) as aclient:
+                self.assertIsNone(aclient.session.timeout.read)
+                return await aclient.request("agents", url=self.url)
+
+        self.assertEqual([{"id": 1}], asyncio.run(fetch()))
+        client.close()
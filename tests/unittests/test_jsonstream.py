@@ -0,0 +1,39 @@
+import json
+import unittest
+
+from tap_zendesk_chat.jsonstream import iter_object_items
+
+
+def chunked(body: bytes, size: int):
+    return (body[i : i + size] for i in range(0, len(body), size))
+
+
+class TestIterObjectItems(unittest.TestCase):
+    body = json.dumps(
+        {
+            "count": 12345,
+            "docs": {
+                "a": {"id": "a", "history": [{"msg": "héllo }{ \\"}]},
+                "b": {"id": "b", "rating": None, "duration": 10.5},
+            },
+            "next_url": None,
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+    def test_items_for_any_chunk_size(self):
+        """tests the items decode the same whatever the chunk boundaries,
+        including multi-byte characters split across chunks."""
+        expected = list(json.loads(self.body)["docs"].items())
+        for size in (1, 2, 7, 64, len(self.body)):
+            self.assertEqual(expected, list(iter_object_items(chunked(self.body, size), "docs")))
+
+    def test_missing_or_empty_key(self):
+        """tests nothing is yielded when the key is absent, empty or null."""
+        for body in (b"{}", b'{"docs": {}}', b'{"docs": null, "x": 1}'):
+            self.assertEqual([], list(iter_object_items(chunked(body, 3), "docs")))
+
+    def test_truncated_body(self):
+        """tests a truncated body raises a decode error."""
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_object_items(chunked(self.body[:-20], 5), "docs"))
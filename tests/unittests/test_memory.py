@@ -0,0 +1,33 @@
+import tracemalloc
+import unittest
+from unittest import mock
+
+from tap_zendesk_chat.memory import MemoryBudget
+
+
+class TestMemoryBudget(unittest.TestCase):
+    def tearDown(self):
+        tracemalloc.stop()
+
+    def test_disabled_without_config(self):
+        """tests batch sizes are untouched and tracing is not started when no
+        budget is configured."""
+        budget = MemoryBudget.from_config({})
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(40, budget.batch_size(40))
+
+    def test_batch_size_scaling(self):
+        """tests batches shrink above the high watermark, never below the
+        minimum, and grow back once memory is released."""
+        budget = MemoryBudget(limit_mb=1)
+        with mock.patch.object(budget, "current", return_value=1024 * 1024):
+            self.assertEqual(20, budget.batch_size(40))
+            self.assertEqual(10, budget.batch_size(40))
+            for _ in range(10):
+                budget.batch_size(40)
+            self.assertEqual(1, budget.batch_size(40))
+        with mock.patch.object(budget, "current", return_value=0):
+            self.assertEqual(2, budget.batch_size(40))
+            for _ in range(10):
+                budget.batch_size(40)
+            self.assertEqual(40, budget.batch_size(40))
@@ -0,0 +1,105 @@
+import unittest
+from unittest import mock
+
+import requests
+from singer import Transformer
+
+from tap_zendesk_chat.context import Context
+from tap_zendesk_chat.pagelimit import AdaptivePageLimit
+from tap_zendesk_chat.streams import Agents, Bans
+
+
+def http_error(status_code):
+    return requests.HTTPError(f"{status_code} Error", response=mock.Mock(status_code=status_code))
+
+
+class TestAdaptivePageLimit(unittest.TestCase):
+    def test_fixed_without_adaptive_page_limits(self):
+        page_limit = AdaptivePageLimit.from_config({"agents_page_limit": 50}, "agents")
+        page_limit.observe(50, 50, 0.01, 100)
+        self.assertEqual(50, page_limit.limit)
+        self.assertFalse(page_limit.shrink_after(requests.ConnectionError()))
+
+    def test_grows_on_fast_pages_and_shrinks_on_slow_pages(self):
+        page_limit = AdaptivePageLimit(100, True, maximum=1000)
+        page_limit.observe(100, 100, 0.1, 10000)
+        page_limit.observe(200, 200, 0.1, 20000)
+        self.assertEqual(400, page_limit.limit)
+        page_limit.observe(400, 400, 6.0, 40000)
+        self.assertEqual(200, page_limit.limit)
+        page_limit.observe(200, 200, 0.1, 5 * 1024 * 1024)
+        self.assertEqual(100, page_limit.limit)
+        for _ in range(10):
+            page_limit.observe(1000, 1000, 0.1, 100)
+        self.assertEqual(1000, page_limit.limit)
+
+    def test_short_page_caps_the_limit(self):
+        """the server returning fewer records than asked for is its page
+        size."""
+        page_limit = AdaptivePageLimit(100, True)
+        page_limit.observe(100, 100, 0.1, 100)
+        page_limit.observe(200, 150, 0.1, 100)
+        self.assertEqual(150, page_limit.limit)
+        page_limit.observe(150, 150, 0.1, 100)
+        self.assertEqual(150, page_limit.limit)
+
+    def test_errors(self):
+        page_limit = AdaptivePageLimit(100, True, minimum=25)
+        self.assertTrue(page_limit.shrink_after(http_error(500)))
+        self.assertTrue(page_limit.shrink_after(requests.ConnectionError()))
+        self.assertEqual(25, page_limit.limit)
+        self.assertFalse(page_limit.shrink_after(requests.ConnectionError()))
+        self.assertFalse(page_limit.shrink_after(http_error(401)))
+        # a rejected limit is only retried when it was grown
+        self.assertFalse(page_limit.shrink_after(http_error(400)))
+        page_limit.limit = 400
+        self.assertTrue(page_limit.shrink_after(http_error(400)))
+        self.assertEqual(200, page_limit.limit)
+        self.assertEqual(200, page_limit.ceiling)
+
+
+class TestSinceIdPaging(unittest.TestCase):
+    config = {"start_date": "2022-01-01T00:00:00Z", "access_token": "", "adaptive_page_limits": True}
+
+    def serve(self, records, server_limit):
+        def request(tap_stream_id, params=None, url=None, url_extra=""):
+            self.limits.append(params["limit"])
+            page = [rec for rec in records if rec["id"] >= params["since_id"]][: min(params["limit"], server_limit)]
+            if tap_stream_id == "bans":
+                return {"visitor": page, "ip_address": []}
+            return page
+
+        return request
+
+    @mock.patch("singer.write_records")
+    def test_agents_grow_to_the_server_page_size(self, mocked_write_records):
+        records = [{"id": idx} for idx in range(1, 3001)]
+        ctx = Context(self.config, {}, {})
+        self.limits = []
+        with mock.patch.object(ctx.client, "request", side_effect=self.serve(records, 500)):
+            stream = Agents()
+            stream.sync(ctx, {}, {}, Transformer())
+
+        self.assertEqual(3000, stream.record_count)
+        self.assertEqual([100, 200, 400, 800, 500, 500, 500, 500, 300], self.limits)
+
+    @mock.patch("singer.write_records")
+    def test_bans_shrink_after_server_errors(self, mocked_write_records):
+        records = [{"id": idx} for idx in range(1, 101)]
+        ctx = Context(dict(self.config, bans_page_limit=80), {}, {})
+        serve = self.serve(records, 1000)
+        self.limits = []
+
+        def request(tap_stream_id, params=None, url=None, url_extra=""):
+            if params["limit"] > 40:
+                self.limits.append(params["limit"])
+                raise http_error(503)
+            return serve(tap_stream_id, params)
+
+        with mock.patch.object(ctx.client, "request", side_effect=request):
+            stream = Bans()
+            stream.sync(ctx, {}, {}, Transformer())
+
+        self.assertEqual(100, stream.record_count)
+        # the limit that failed is not tried again
+        self.assertEqual([80, 40, 40, 40, 20], self.limits)
@@ -0,0 +1,46 @@
+import io
+import json
+import unittest
+from unittest import mock
+
+from singer.utils import strptime_to_utc
+
+from tap_zendesk_chat import planner
+from tap_zendesk_chat.context import Context
+
+
+class TestPlanner(unittest.TestCase):
+    config = {
+        "start_date": "2022-01-01T00:00:00Z",
+        "access_token": "",
+        "chat_search_interval_days": 10,
+        "max_requests_per_minute": 60,
+    }
+
+    def request(self, tap_stream_id, params=None, url=None, url_extra=""):
+        self.searches.append(params["q"])
+        if "type:chat" in params["q"] and "2022-01-11" in params["q"].split(" TO ")[0]:
+            # the second chat window holds 10000 chats at 20 per page
+            return {"results": [{"id": str(idx)} for idx in range(20)], "count": 10000, "next_url": "https://next"}
+        return {"results": [{"id": "1"}], "count": 1, "next_url": None}
+
+    def test_plan(self):
+        """tests one search request per window and the estimates derived from
+        the counts."""
+        ctx = Context(self.config, {"bookmarks": {"chats": {"offline_msg.timestamp": "2022-01-11T00:00:00Z"}}}, None)
+        ctx.now = strptime_to_utc("2022-01-21T00:00:00Z")
+        self.searches = []
+        with mock.patch.object(ctx.client, "request", side_effect=self.request), mock.patch(
+            "sys.stdout", new_callable=io.StringIO
+        ) as stdout:
+            summary = planner.plan(ctx)
+
+        self.assertEqual(3, len(self.searches))
+        self.assertEqual(summary, json.loads(stdout.getvalue())["summary"])
+        self.assertEqual(10002, summary["count"])
+        self.assertEqual(1, summary["overflowing_windows"])
+        self.assertEqual(502, summary["search_requests"])
+        self.assertEqual(1004, summary["requests"])
+        self.assertEqual(1004.0, summary["projected_runtime_seconds"])
+        # 500 pages in 10 days, 200 pages fit in 4 days
+        self.assertEqual(4, summary["suggested_chat_search_interval_days"])
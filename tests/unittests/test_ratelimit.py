@@ -0,0 +1,49 @@
+import tempfile
+import unittest
+from unittest import mock
+
+from tap_zendesk_chat.ratelimit import RateLimiter, SharedRateLimiter
+
+
+class TestRateLimiter(unittest.TestCase):
+    @mock.patch("time.sleep")
+    @mock.patch("time.monotonic", return_value=100.0)
+    def test_requests_are_spaced(self, mocked_monotonic, mocked_sleep):
+        """tests consecutive requests are scheduled one interval apart."""
+        limiter = RateLimiter.from_config({"max_requests_per_minute": 120})
+        for _ in range(3):
+            limiter.acquire()
+        self.assertEqual([mock.call(0.5), mock.call(1.0)], mocked_sleep.call_args_list)
+
+    @mock.patch("time.sleep")
+    def test_unlimited_by_default(self, mocked_sleep):
+        """tests no limit is applied when none is configured."""
+        limiter = RateLimiter.from_config({})
+        for _ in range(3):
+            limiter.acquire()
+        mocked_sleep.assert_not_called()
+
+
+class TestSharedRateLimiter(unittest.TestCase):
+    @mock.patch("time.sleep")
+    @mock.patch("time.time", return_value=1000.0)
+    def test_budget_is_shared_between_limiters(self, mocked_time, mocked_sleep):
+        """tests limiters for the same credentials, as in separate processes,
+        split one schedule and are all paused after a rate limited
+        response."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config = {"access_token": "abc", "shared_rate_limit_dir": tmp_dir, "max_requests_per_minute": 60}
+            first, second = RateLimiter.from_config(config), RateLimiter.from_config(config)
+            other = RateLimiter.from_config(dict(config, access_token="xyz"))
+            self.assertIsInstance(first, SharedRateLimiter)
+
+            first.acquire()
+            second.acquire()
+            other.acquire()
+            first.acquire()
+            self.assertEqual([mock.call(1.0), mock.call(2.0)], mocked_sleep.call_args_list)
+
+            mocked_sleep.reset_mock()
+            second.penalize(30)
+            first.acquire()
+            mocked_sleep.assert_called_once_with(30.0)
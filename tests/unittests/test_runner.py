@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import singer
+
+from tap_zendesk_chat import runner
+from tap_zendesk_chat.http import InvalidConfigurationError
+
+
+def fake_sync(ctx):
+    """writes one record and the final state for the account."""
+    singer.write_record("departments", {"id": ctx.config["access_token"], "thread": threading.get_ident()})
+    ctx.state["bookmarks"] = {"departments": ctx.config["access_token"]}
+    singer.write_state(ctx.state)
+
+
+class TestRunner(unittest.TestCase):
+    @mock.patch("tap_zendesk_chat.runner.run_sync", side_effect=fake_sync)
+    def test_accounts_get_their_own_output(self, mocked_sync):
+        """tests each account's messages and state end up in its own files and
+        a failing account does not stop the others."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            accounts = []
+            for name in ("a", "b", "c"):
+                with open(os.path.join(tmp_dir, f"{name}.json"), "w", encoding="utf-8") as config:
+                    json.dump({"start_date": "2022-01-01", "access_token": name}, config)
+                accounts.append(
+                    {
+                        "name": name,
+                        "config": f"{name}.json",
+                        "catalog": "catalog.json",
+                        "output": f"{name}.out",
+                        "state_output": f"{name}.state",
+                    }
+                )
+            accounts[2]["config"] = "missing.json"
+            with open(os.path.join(tmp_dir, "catalog.json"), "w", encoding="utf-8") as catalog:
+                json.dump({"streams": []}, catalog)
+            with open(os.path.join(tmp_dir, "accounts.json"), "w", encoding="utf-8") as accounts_file:
+                json.dump(accounts, accounts_file)
+
+            failed = runner.run(runner.load_accounts(os.path.join(tmp_dir, "accounts.json")), workers=2)
+
+            self.assertEqual(1, failed)
+            for name in ("a", "b"):
+                with open(os.path.join(tmp_dir, f"{name}.out"), encoding="utf-8") as output:
+                    messages = [json.loads(line) for line in output]
+                self.assertEqual([name], [m["record"]["id"] for m in messages if m["type"] == "RECORD"])
+                with open(os.path.join(tmp_dir, f"{name}.state"), encoding="utf-8") as state:
+                    self.assertEqual({"departments": name}, json.load(state)["bookmarks"])
+
+    @mock.patch("tap_zendesk_chat.runner.run_sync")
+    @mock.patch("tap_zendesk_chat.runner.Context")
+    def test_account_options(self, mocked_context, mocked_run_sync):
+        """tests http2 accounts get their own client instead of the shared
+        pool and tailing accounts are rejected."""
+        stdout = runner.ThreadRoutedStdout(None)
+        session = mock.Mock()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            account = {
+                "name": "a",
+                "config": os.path.join(tmp_dir, "config.json"),
+                "state": None,
+                "catalog": None,
+                "output": os.path.join(tmp_dir, "a.out"),
+                "state_output": None,
+            }
+            for options, expected_session in (({}, session), ({"http2": True}, None)):
+                with open(account["config"], "w", encoding="utf-8") as config:
+                    json.dump({"start_date": "2022-01-01", "access_token": "a", **options}, config)
+                runner.sync_account(account, session, stdout)
+                self.assertIs(expected_session, mocked_context.call_args.kwargs["session"])
+            self.assertEqual(2, mocked_run_sync.call_count)
+
+            with open(account["config"], "w", encoding="utf-8") as config:
+                json.dump({"start_date": "2022-01-01", "access_token": "a", "tail_interval_seconds": 60}, config)
+            with self.assertRaisesRegex(InvalidConfigurationError, "tail_interval_seconds"):
+                runner.sync_account(account, session, stdout)
+            self.assertEqual(2, mocked_run_sync.call_count)
@@ -0,0 +1,80 @@
+import unittest
+
+from singer.utils import strptime_to_utc
+
+from tap_zendesk_chat.shards import merge_states, plan_shards
+
+
+def finished_state(chat_bookmark, offline_bookmark):
+    return {
+        "currently_syncing": None,
+        "bookmarks": {
+            "chats": {
+                "chat.end_timestamp": chat_bookmark,
+                "offline_msg.timestamp": offline_bookmark,
+                "offset": {"chat.next_url": None, "offline_msg.next_url": None},
+            }
+        },
+    }
+
+
+class TestShards(unittest.TestCase):
+    def setUp(self):
+        self.shards = plan_shards(strptime_to_utc("2022-01-01"), strptime_to_utc("2022-01-31"), 3)
+
+    def test_plan_shards(self):
+        """tests shards are contiguous and cover the whole range."""
+        self.assertEqual(
+            [
+                ("2022-01-01T00:00:00+00:00", "2022-01-11T00:00:00+00:00"),
+                ("2022-01-11T00:00:00+00:00", "2022-01-21T00:00:00+00:00"),
+                ("2022-01-21T00:00:00+00:00", "2022-01-31T00:00:00+00:00"),
+            ],
+            [(shard["start_date"], shard["chats_end_date"]) for shard in self.shards],
+        )
+
+    def test_merge_completed_shards(self):
+        """tests the merged bookmark is the latest one of the completed
+        shards, even when the last shard had no chats."""
+        self.shards[0]["state"] = finished_state("2022-01-10T00:00:00Z", "2022-01-09T00:00:00Z")
+        self.shards[1]["state"] = finished_state("2022-01-20T00:00:00Z", "2022-01-19T00:00:00Z")
+        self.shards[2]["state"] = finished_state("2022-01-21T00:00:00+00:00", "2022-01-21T00:00:00+00:00")
+
+        merged = merge_states(self.shards)
+        self.assertEqual("2022-01-21T00:00:00+00:00", merged["bookmarks"]["chats"]["chat.end_timestamp"])
+        self.assertEqual("2022-01-31T00:00:00+00:00", merged["chats_last_full_sync"])
+
+    def test_merge_stops_at_incomplete_shard(self):
+        """tests an interrupted or missing shard caps the merged bookmark at
+        its last window bookmark."""
+        self.shards[0]["state"] = finished_state("2022-01-10T00:00:00Z", "2022-01-09T00:00:00Z")
+        self.shards[1]["state"] = finished_state("2022-01-15T00:00:00Z", "2022-01-19T00:00:00Z")
+        self.shards[1]["state"]["bookmarks"]["chats"]["offset"]["chat.next_url"] = "https://next"
+        self.shards[2]["state"] = finished_state("2022-01-30T00:00:00Z", "2022-01-30T00:00:00Z")
+
+        merged = merge_states(self.shards)
+        chats = merged["bookmarks"]["chats"]
+        self.assertEqual("2022-01-15T00:00:00Z", chats["chat.end_timestamp"])
+        self.assertEqual("2022-01-30T00:00:00Z", chats["offline_msg.timestamp"])
+        self.assertEqual(
+            {
+                "chat.next_url": None,
+                "chat.pending_ids": None,
+                "chat.window_start": None,
+                "offline_msg.next_url": None,
+                "offline_msg.pending_ids": None,
+                "offline_msg.window_start": None,
+            },
+            chats["offset"],
+        )
+        self.assertNotIn("chats_last_full_sync", merged)
+
+        self.shards[0]["state"] = {}
+        merged = merge_states(self.shards)
+        self.assertEqual("2022-01-01T00:00:00+00:00", merged["bookmarks"]["chats"]["chat.end_timestamp"])
+
+    def test_gap_between_shards(self):
+        """tests shards that leave a gap cannot be merged."""
+        del self.shards[1]
+        with self.assertRaises(ValueError):
+            merge_states(self.shards)
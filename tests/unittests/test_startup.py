@@ -0,0 +1,25 @@
+import subprocess
+import sys
+import unittest
+
+# only needed by async_mode, http2, transform_workers, batch output and the memory budget
+OPTIONAL_MODULES = (
+    "aiohttp",
+    "httpx",
+    "multiprocessing",
+    "pyarrow",
+    "tracemalloc",
+    "tap_zendesk_chat.async_sync",
+    "tap_zendesk_chat.planner",
+)
+
+
+class TestStartup(unittest.TestCase):
+    def test_import_skips_optional_modules(self):
+        """the modules of the optional modes are imported on use, not at
+        startup."""
+        code = "import sys, tap_zendesk_chat; print(' '.join(sorted(sys.modules)))"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, check=True, text=True)
+        loaded = set(result.stdout.split())
+        self.assertIn("tap_zendesk_chat.sync", loaded)
+        self.assertEqual([name for name in OPTIONAL_MODULES if name in loaded], [])
@@ -0,0 +1,266 @@
+import unittest
+from unittest import mock
+
+from singer import Transformer, metadata
+from singer.utils import strptime_to_utc
+
+from tap_zendesk_chat.context import Context
+from tap_zendesk_chat.discover import discover
+from tap_zendesk_chat.streams import ChatHistory, Chats, ChatVisitor, Departments
+from tap_zendesk_chat.sync import sync
+
+
+class TestRecordCounter(unittest.TestCase):
+    @mock.patch("singer.write_records")
+    def test_counter_lives_for_the_stream(self, mocked_write_records):
+        """tests pages are added to one stream wide counter instead of a
+        counter per page."""
+        stream = Departments()
+        counter = stream.counter
+        with mock.patch.object(counter, "_pop") as mocked_pop:
+            with counter:
+                for _ in range(1000):
+                    stream.write_page([{"id": 1}, {"id": 2}])
+            mocked_pop.assert_called_once_with()
+        self.assertIs(counter, stream.counter)
+        self.assertEqual(2000, stream.record_count)
+        self.assertEqual(2000, counter.value)
+
+
+class TestChatsPageResume(unittest.TestCase):
+    config = {"start_date": "2022-01-01T00:00:00Z", "access_token": "", "chat_search_interval_days": 10}
+
+    def request(self, tap_stream_id, params=None, url=None, url_extra=""):
+        self.requests.append((params, url, url_extra))
+        if params and "ids" in params:
+            ids = params["ids"].split(",")
+            return {"docs": {chat_id: {"id": chat_id, "end_timestamp": "2022-01-02T00:00:00Z"} for chat_id in ids}}
+        return {"results": [{"id": "4"}], "next_url": None}
+
+    @mock.patch("singer.write_records")
+    def test_resume_pending_page(self, mocked_write_records):
+        """tests a sync resumed mid page first emits only the pending chats,
+        then continues the stored window with the next page url."""
+        state = {
+            "bookmarks": {
+                "chats": {
+                    "chat.end_timestamp": "2022-01-05T00:00:00Z",
+                    "offset": {
+                        "chat.window_start": "2022-01-01T00:00:00+00:00",
+                        "chat.next_url": "https://next",
+                        "chat.pending_ids": ["2", "3"],
+                    },
+                }
+            }
+        }
+        ctx = Context(self.config, state, {})
+        ctx.now = strptime_to_utc("2022-01-11T00:00:00Z")
+        self.requests = []
+        with mock.patch.object(ctx.client, "request", side_effect=self.request), mock.patch.object(ctx, "write_state"):
+            Chats()._pull(ctx, "chat", "end_timestamp", {}, {}, Transformer())
+
+        self.assertEqual(
+            [({"ids": "2,3"}, None, ""), (None, "https://next", ""), ({"ids": "4"}, None, "")], self.requests
+        )
+        written = [call.args[1][0]["id"] for call in mocked_write_records.call_args_list]
+        self.assertEqual(["2", "3", "4"], written)
+        offset = ctx.bookmarks["chats"]["offset"]
+        for key in ("window_start", "next_url", "pending_ids"):
+            self.assertIsNone(offset[f"chat.{key}"])
+        self.assertEqual("2022-01-05T00:00:00Z", ctx.bookmarks["chats"]["chat.end_timestamp"])
+
+
+class TestChatsRollingResync(unittest.TestCase):
+    config = {
+        "start_date": "2022-01-01T00:00:00Z",
+        "access_token": "",
+        "chat_search_interval_days": 5,
+        "chats_full_sync_days": 4,
+        "chats_full_sync_mode": "rolling",
+    }
+
+    def request(self, tap_stream_id, params=None, url=None, url_extra=""):
+        if params and "q" in params:
+            self.searches.append(params["q"])
+        return {"results": [], "next_url": None}
+
+    def test_slices_cover_the_history(self):
+        """tests each run re-syncs the share of the history matching the time
+        since the last run, leaves the incremental bookmark alone and starts
+        over once the cursor reaches it."""
+        state = {
+            "chats_resync_last_run": "2022-01-20T00:00:00+00:00",
+            "bookmarks": {
+                "chats": {"chat.end_timestamp": "2022-01-21T00:00:00Z", "offline_msg.timestamp": "2022-01-21T00:00:00Z"}
+            },
+        }
+        ctx = Context(self.config, state, {})
+        ctx.now = strptime_to_utc("2022-01-21T00:00:00Z")
+        self.searches = []
+        with mock.patch.object(ctx.client, "request", side_effect=self.request), mock.patch.object(ctx, "write_state"):
+            Chats()._rolling_resync(ctx, {}, {}, Transformer())
+            chats = ctx.bookmarks["chats"]
+            self.assertEqual("2022-01-06T00:00:00+00:00", chats["chat.resync_cursor"])
+            self.assertEqual("2022-01-06T00:00:00+00:00", chats["offline_msg.resync_cursor"])
+            self.assertEqual("2022-01-21T00:00:00Z", chats["chat.end_timestamp"])
+            self.assertEqual(2, len(self.searches))
+            self.assertIn("end_timestamp:[2022-01-01T00:00:00 TO 2022-01-06T00:00:00]", self.searches[0])
+
+            ctx.now = strptime_to_utc("2022-01-25T00:00:00Z")
+            Chats()._rolling_resync(ctx, {}, {}, Transformer())
+            self.assertIsNone(chats["chat.resync_cursor"])
+            self.assertEqual("2022-01-25T00:00:00+00:00", ctx.state["chats_resync_last_run"])
+            self.assertFalse(Chats().should_run_full_sync(ctx))
+
+
+class TestChatsLookback(unittest.TestCase):
+    config = {
+        "start_date": "2022-01-01T00:00:00Z",
+        "access_token": "",
+        "chat_search_interval_days": 2,
+        "chats_lookback_days": 3,
+    }
+
+    def request(self, tap_stream_id, params=None, url=None, url_extra=""):
+        self.requests.append(params)
+        if "ids" in params:
+            ids = params["ids"].split(",")
+            return {"docs": {chat_id: {"id": chat_id, "end_timestamp": "2022-01-09T00:00:00Z"} for chat_id in ids}}
+        # every window finds the chat ending on its boundary
+        return {"results": [{"id": "1"}, {"id": "2"}], "next_url": None}
+
+    @mock.patch("singer.write_records")
+    def test_lookback_rescans_recent_days_once(self, mocked_write_records):
+        """tests the search starts lookback days before the bookmark without
+        moving it back, and chats found by several windows are fetched
+        once."""
+        state = {"bookmarks": {"chats": {"chat.end_timestamp": "2022-01-10T00:00:00+00:00"}}}
+        ctx = Context(self.config, state, {})
+        ctx.now = strptime_to_utc("2022-01-11T00:00:00Z")
+        self.requests = []
+        with mock.patch.object(ctx.client, "request", side_effect=self.request), mock.patch.object(ctx, "write_state"):
+            stream = Chats()
+            stream._pull(ctx, "chat", "end_timestamp", {}, {}, Transformer())
+
+        searches = [params["q"] for params in self.requests if "q" in params]
+        self.assertEqual(2, len(searches))
+        self.assertIn("[2022-01-07T00:00:00 TO 2022-01-09T00:00:00]", searches[0])
+        self.assertEqual([{"ids": "1,2"}], [params for params in self.requests if "ids" in params])
+        self.assertEqual(2, stream.duplicates_skipped)
+        self.assertEqual("2022-01-10T00:00:00+00:00", ctx.bookmarks["chats"]["chat.end_timestamp"])
+
+    @mock.patch("singer.write_records")
+    def test_duplicate_page_leaves_no_pending_ids(self, mocked_write_records):
+        """tests a search page of chats that were all emitted by an earlier
+        window clears the page offsets, a later run must not resume it."""
+        state = {"bookmarks": {"chats": {"chat.end_timestamp": "2022-01-10T00:00:00+00:00"}}}
+        ctx = Context(self.config, state, {})
+        ctx.now = strptime_to_utc("2022-01-11T00:00:00Z")
+        self.requests = []
+        with mock.patch.object(ctx.client, "request", side_effect=self.request), mock.patch.object(ctx, "write_state"):
+            Chats()._pull(ctx, "chat", "end_timestamp", {}, {}, Transformer())
+
+        offset = ctx.bookmarks["chats"]["offset"]
+        for key in ("window_start", "next_url", "pending_ids"):
+            self.assertIsNone(offset[f"chat.{key}"])
+
+
+class TestChatsSearchOnly(unittest.TestCase):
+    config = {"start_date": "2022-01-01T00:00:00Z", "access_token": "", "chat_search_interval_days": 10}
+    schema = {"properties": {field: {"type": ["null", "string"]} for field in ("id", "type", "end_timestamp", "tags")}}
+
+    def test_detection(self):
+        """tests search only mode is detected when no field outside the
+        search results is emitted, and can be forced either way."""
+        tags_deselected = {("properties", "tags"): {"selected": False}}
+        search_fields = {("properties", field): {"selected": False} for field in ("tags", "end_timestamp")}
+        self.assertFalse(Chats.is_search_only(self.config, self.schema, {}))
+        # end_timestamp is not in the search results
+        self.assertFalse(Chats.is_search_only(self.config, self.schema, tags_deselected))
+        self.assertTrue(Chats.is_search_only(self.config, self.schema, search_fields))
+        forced_off = dict(self.config, chats_search_only=False)
+        self.assertFalse(Chats.is_search_only(forced_off, self.schema, search_fields))
+        self.assertTrue(Chats.is_search_only(dict(self.config, chats_search_only=True), self.schema, {}))
+
+    def test_replication_key_keeps_bulk_requests(self):
+        """tests deselecting every other field of the discovered catalog
+        still fetches the full chats, the automatic end_timestamp is not in
+        the search results."""
+        entry = discover(None).get_stream("chats")
+        stream_metadata = metadata.to_map(entry.metadata)
+        for breadcrumb, field_metadata in stream_metadata.items():
+            if breadcrumb and field_metadata.get("inclusion") == "available":
+                field_metadata["selected"] = False
+        self.assertFalse(Chats.is_search_only(self.config, entry.schema.to_dict(), stream_metadata))
+
+    @mock.patch("singer.write_records")
+    def test_no_bulk_requests(self, mocked_write_records):
+        """tests chats are written from the search results and the window end
+        becomes the bookmark."""
+        requests = []
+
+        def request(tap_stream_id, params=None, url=None, url_extra=""):
+            requests.append(params)
+            return {"results": [{"id": "1", "type": "chat", "preview": "hi"}], "next_url": None}
+
+        ctx = Context(self.config, {}, {})
+        ctx.now = strptime_to_utc("2022-01-06T00:00:00Z")
+        stream = Chats()
+        stream.search_only = True
+        with mock.patch.object(ctx.client, "request", side_effect=request), mock.patch.object(ctx, "write_state"):
+            stream._pull(ctx, "chat", "end_timestamp", self.schema, {}, Transformer())
+
+        self.assertEqual(1, len(requests))
+        self.assertIn("q", requests[0])
+        self.assertEqual([{"id": "1", "type": "chat", "preview": "hi"}], mocked_write_records.call_args.args[1])
+        self.assertEqual("2022-01-06T00:00:00+00:00", ctx.bookmarks["chats"]["chat.end_timestamp"])
+
+
+class TestChatChildren(unittest.TestCase):
+    config = {"start_date": "2022-01-01T00:00:00Z", "access_token": "", "chat_search_interval_days": 10}
+    chat = {
+        "id": "1",
+        "type": "chat",
+        "end_timestamp": "2022-01-02T00:00:00Z",
+        "visitor": {"id": "v1", "name": "Visitor"},
+        "history": [{"msg": "hi", "type": "chat.msg"}, {"msg": "bye", "type": "chat.msg"}],
+        "webpath": [],
+    }
+
+    def test_child_records(self):
+        self.assertEqual([{"id": "v1", "name": "Visitor", "chat_id": "1"}], ChatVisitor().child_records(self.chat))
+        history = ChatHistory().child_records(self.chat)
+        self.assertEqual([("1", 0), ("1", 1)], [(rec["chat_id"], rec["index"]) for rec in history])
+        self.assertEqual([], ChatHistory().child_records({"id": "2", "history": None}))
+
+    @mock.patch("tap_zendesk_chat.sync.write_schema")
+    @mock.patch("singer.write_records")
+    def test_children_without_chats(self, mocked_write_records, mocked_write_schema):
+        """tests selecting only a child stream runs the chats sync without
+        writing chats, and the child records come from the bulk chats."""
+        catalog = discover(None)
+        entry = catalog.get_stream("chat_history")
+        entry.metadata = metadata.to_list(metadata.write(metadata.to_map(entry.metadata), (), "selected", True))
+        requests = []
+
+        def request(tap_stream_id, params=None, url=None, url_extra=""):
+            requests.append(params)
+            if params and "ids" in params:
+                return {"docs": {"1": self.chat}}
+            if url_extra == "/search" and "type:chat " in params["q"]:
+                return {"results": [{"id": "1"}], "next_url": None}
+            return {"results": [], "next_url": None}
+
+        ctx = Context(self.config, {}, catalog)
+        ctx.now = strptime_to_utc("2022-01-06T00:00:00Z")
+        with mock.patch.object(ctx.client, "request", side_effect=request), mock.patch.object(ctx, "write_state"):
+            sync(ctx)
+
+        self.assertEqual(["chat_history"], [call.args[0] for call in mocked_write_schema.call_args_list])
+        self.assertEqual({"chat_history"}, {call.args[0] for call in mocked_write_records.call_args_list})
+        records = mocked_write_records.call_args.args[1]
+        self.assertEqual(
+            [("1", 0, "hi"), ("1", 1, "bye")], [(rec["chat_id"], rec["index"], rec["msg"]) for rec in records]
+        )
+        self.assertIn({"ids": "1"}, requests)
+        self.assertEqual("2022-01-02T00:00:00.000000Z", ctx.bookmarks["chats"]["chat.end_timestamp"])
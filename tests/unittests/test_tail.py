@@ -0,0 +1,43 @@
+import signal
+import unittest
+from unittest import mock
+
+from tap_zendesk_chat import tail
+from tap_zendesk_chat.context import Context
+
+
+class Entry:
+    def __init__(self, tap_stream_id):
+        self.tap_stream_id = tap_stream_id
+
+
+class TestTail(unittest.TestCase):
+    config = {"start_date": "2022-01-01T00:00:00Z", "access_token": ""}
+
+    @mock.patch("tap_zendesk_chat.tail.sync")
+    @mock.patch("tap_zendesk_chat.tail.sync_stream")
+    def test_polls_chats_until_signalled(self, mocked_sync_stream, mocked_sync):
+        """tests the first cycle syncs every stream, later cycles only poll
+        chats with a fresh now, and SIGTERM stops the loop."""
+        catalog = mock.Mock()
+        catalog.get_selected_streams.return_value = [Entry("agents"), Entry("chats")]
+        ctx = Context(self.config, {}, catalog)
+        started = ctx.now
+        polled = []
+
+        def poll(ctx, stream, transformer, **kwargs):
+            polled.append((stream.tap_stream_id, ctx.now))
+            ctx.state["currently_syncing"] = "chats"
+            if len(polled) == 3:
+                signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)
+
+        mocked_sync_stream.side_effect = poll
+        handler = signal.getsignal(signal.SIGTERM)
+        with mock.patch.object(ctx, "write_state"):
+            tail.run(ctx, 0)
+
+        mocked_sync.assert_called_once_with(ctx)
+        self.assertEqual(["chats"] * 3, [tap_stream_id for tap_stream_id, _ in polled])
+        self.assertGreater(polled[0][1], started)
+        self.assertTrue(ctx.out_of_time())
+        self.assertIs(handler, signal.getsignal(signal.SIGTERM))
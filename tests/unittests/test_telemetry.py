@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+from tap_zendesk_chat.telemetry import Histogram, Telemetry
+
+
+class TestHistogram(unittest.TestCase):
+    def test_quantiles(self):
+        """tests quantiles are interpolated within the matching bucket."""
+        hist = Histogram(buckets=(1.0, 2.0, 4.0))
+        for value in (0.5, 0.5, 1.5, 3.0):
+            hist.observe(value)
+        self.assertEqual(4, hist.count)
+        self.assertEqual(0.5, hist.quantile(0.25))
+        self.assertEqual(2.0, hist.quantile(0.75))
+        self.assertEqual(4.0, hist.quantile(1.0))
+        self.assertEqual([(1.0, 2), (2.0, 3), (4.0, 4), (float("inf"), 4)], list(hist.cumulative()))
+
+
+class TestTelemetry(unittest.TestCase):
+    def test_render(self):
+        """tests the rendered text contains the aggregated families and ends
+        with the OpenMetrics EOF marker."""
+        telemetry = Telemetry()
+        telemetry.observe_request("chats", 200, 0.2)
+        telemetry.observe_request("chats", 429, 0.1)
+        telemetry.observe_backoff(2.0)
+        telemetry.observe_stream("chats", 10, 5.0)
+        text = telemetry.render()
+
+        self.assertIn('tap_zendesk_chat_request_duration_seconds_count{endpoint="chats"} 2', text)
+        self.assertIn('tap_zendesk_chat_rate_limited_total{endpoint="chats"} 1', text)
+        self.assertIn("tap_zendesk_chat_backoff_sleep_seconds_total 2.0", text)
+        self.assertIn('tap_zendesk_chat_records_per_second{stream="chats"} 2.0', text)
+        self.assertTrue(text.endswith("# EOF\n"))
+
+    def test_write(self):
+        """tests the metrics file is written only when a path is
+        configured."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "tap.prom")
+            Telemetry().write()
+            Telemetry.from_config({"metrics_file": path}).write()
+            self.assertEqual(["tap.prom"], os.listdir(tmp_dir))
+
+    def test_flush_unwritable_path(self):
+        """tests a metrics file that cannot be written is logged instead of
+        failing the sync."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            telemetry = Telemetry.from_config({"metrics_file": os.path.join(tmp_dir, "missing", "tap.prom")})
+            with self.assertLogs(level="WARNING"):
+                telemetry.flush()
+
+    def test_summary(self):
+        """tests the summary aggregates requests, retries, bytes and windows
+        per stream and keeps only the slowest windows."""
+        telemetry = Telemetry()
+        telemetry.observe_request("chats", 429, 0.1)
+        telemetry.observe_backoff(1.0, "chats")
+        telemetry.observe_request("chats", 200, 0.2)
+        telemetry.observe_bytes("chats", 512)
+        telemetry.observe_stream("chats", 3, 2.0)
+        telemetry.observe_bookmarks("chats", None, {"chat.end_timestamp": "2022-01-02T00:00:00"})
+        for seconds in range(10):
+            telemetry.observe_window("chats", {"chat_type": "chat", "seconds": seconds})
+
+        summary = telemetry.summary()["streams"]["chats"]
+        self.assertEqual(3, summary["records"])
+        self.assertEqual(2, summary["requests"])
+        self.assertEqual(1, summary["retries"])
+        self.assertEqual(512, summary["bytes"])
+        self.assertEqual(10, summary["windows"])
+        self.assertEqual([9, 8, 7, 6, 5], [window["seconds"] for window in summary["slowest_windows"]])
+        self.assertEqual({"chat.end_timestamp": "2022-01-02T00:00:00"}, summary["bookmarks"]["end"])
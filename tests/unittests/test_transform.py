@@ -0,0 +1,41 @@
+import unittest
+from unittest import mock
+
+from singer import Transformer
+
+from tap_zendesk_chat.transform import TransformPool
+
+SCHEMA = {"type": "object", "properties": {"id": {"type": "integer"}, "name": {"type": ["null", "string"]}}}
+
+
+class TestTransformPool(unittest.TestCase):
+    def test_not_configured(self):
+        self.assertIsNone(TransformPool.from_config({}, SCHEMA, {}))
+        self.assertIsNone(TransformPool.from_config({"transform_workers": "1"}, SCHEMA, {}))
+
+    def test_pages_keep_their_order(self):
+        """tests large pages are transformed by the workers in order and small
+        pages in process."""
+        pool = TransformPool.from_config({"transform_workers": 2, "transform_chunk_size": 3}, SCHEMA, {})
+        try:
+            small = pool.transform([{"id": "1", "name": "a"}])
+            self.assertIsNone(pool.executor)
+            records = [{"id": str(idx), "name": f"chat {idx}"} for idx in range(20)]
+            with Transformer() as transformer:
+                expected = [transformer.transform(rec, SCHEMA) for rec in records]
+            self.assertEqual(expected, pool.transform(records))
+            self.assertIsNotNone(pool.executor)
+        finally:
+            pool.close()
+        self.assertEqual([{"id": 1, "name": "a"}], small)
+
+    def test_default_page_is_split_per_worker(self):
+        """tests a default page of 100 records is split into one chunk per
+        worker."""
+        pool = TransformPool.from_config({"transform_workers": 4}, SCHEMA, {})
+        pool.executor = mock.Mock()
+        pool.executor.map.side_effect = lambda fn, chunks: chunks
+        records = [{"id": idx} for idx in range(100)]
+        self.assertEqual(records, pool.transform(records))
+        chunks = pool.executor.map.call_args.args[1]
+        self.assertEqual([25, 25, 25, 25], [len(chunk) for chunk in chunks])